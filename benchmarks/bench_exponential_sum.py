@@ -0,0 +1,79 @@
+"""Benchmark int_list_to_exponential_sum against the generator it replaced.
+
+Times the old sum(math.exp(i) for i in int_list), the vectorized
+log-sum-exp implementation and the decimal precision mode on random lists
+of values below 700, where the old generator does not overflow yet, and
+reports the relative difference between the old and new results.
+Decimal mode is only timed up to --max-decimal-size values.
+
+Usage:
+    python benchmarks/bench_exponential_sum.py --sizes 10 1000 1000000 --precision 50
+"""
+import argparse
+import contextlib
+import io
+import math
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import math_mcp_server  # noqa: E402
+
+# The implementation behind the memoized tool, so every call is computed
+exponential_sum = math_mcp_server.int_list_to_exponential_sum.__wrapped__
+
+
+def generator_sum(int_list: list) -> float:
+    return sum(math.exp(i) for i in int_list)
+
+
+def best_of(runs: int, fn, *args) -> tuple[float, object]:
+    best, result = math.inf, None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='int_list_to_exponential_sum benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000, 1000000], help='List lengths')
+    parser.add_argument('--runs', type=int, default=3, help='Best of this many runs per measurement')
+    parser.add_argument('--precision', type=int, default=50, help='Digits for the decimal mode')
+    parser.add_argument('--max-decimal-size', type=int, default=10000, help='Largest list timed in decimal mode')
+    args = parser.parse_args()
+
+    print(f"{'n':>9}{'generator ms':>15}{'vectorized ms':>15}{'speedup':>10}{'decimal ms':>13}{'rel diff':>11}")
+    for n in args.sizes:
+        values = [random.randint(0, 699) for _ in range(n)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            old_seconds, old = best_of(args.runs, generator_sum, values)
+            new_seconds, new = best_of(args.runs, exponential_sum, values)
+            if n <= args.max_decimal_size:
+                decimal_ms = f"{best_of(1, exponential_sum, values, args.precision)[0] * 1000:.2f}"
+            else:
+                decimal_ms = "-"
+        print(
+            f"{n:>9}{old_seconds * 1000:>15.2f}{new_seconds * 1000:>15.2f}{old_seconds / new_seconds:>9.1f}x"
+            f"{decimal_ms:>13}{abs(new - old) / old:>11.1e}"
+        )
+
+    overflow = [710, 800, 1000]
+    print(f"\nsum(exp({overflow})): generator", end=" ")
+    try:
+        print(generator_sum(overflow))
+    except OverflowError as e:
+        print(f"raises OverflowError ({e})")
+    with contextlib.redirect_stdout(io.StringIO()):
+        log_space = exponential_sum(overflow)
+        exact = exponential_sum(overflow, args.precision)
+    print(f"vectorized returns {log_space}, decimal returns {exact}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Startup benchmark for the Gmail MCP server.
+
+Measures the time from spawning gmail_mcp_server.py until it answers
+list_tools, which is what mcp_client.py waits on before the first LLM call.
+The server no longer talks to Google while starting up, so a placeholder
+token is enough and no Google account is needed.
+
+Usage:
+    python benchmarks/bench_gmail_startup.py --runs 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_placeholder_token(path: str) -> None:
+    """Write a token.json that loads as valid, unexpired credentials"""
+    expiry = datetime.now(timezone.utc) + timedelta(hours=1)
+    with open(path, 'w') as token:
+        json.dump({
+            "token": "placeholder",
+            "refresh_token": "placeholder",
+            "client_id": "placeholder.apps.googleusercontent.com",
+            "client_secret": "placeholder",
+            "token_uri": "https://oauth2.googleapis.com/token",
+            "expiry": expiry.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }, token)
+
+
+async def time_startup(token_path: str) -> tuple[float, float]:
+    """Return seconds until initialize and until list_tools responded"""
+    server_params = StdioServerParameters(
+        command=sys.executable,
+        args=[
+            os.path.join(ROOT, "gmail_mcp_server.py"),
+            "--creds-file-path", os.path.join(ROOT, "credentials.json"),
+            "--token-path", token_path,
+            "--cache-path", "",
+        ],
+        cwd=ROOT,
+    )
+    start = time.perf_counter()
+    async with stdio_client(server_params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            initialized = time.perf_counter() - start
+            await session.list_tools()
+            listed = time.perf_counter() - start
+    return initialized, listed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Gmail MCP server startup benchmark')
+    parser.add_argument('--runs', type=int, default=10, help='Number of server spawns to time')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        token_path = os.path.join(tmp, "token.json")
+        write_placeholder_token(token_path)
+        results = [await time_startup(token_path) for _ in range(args.runs)]
+
+    for label, values in (("initialize", [r[0] for r in results]), ("list_tools", [r[1] for r in results])):
+        print(
+            f"{label:>10}: median {statistics.median(values) * 1000:.1f} ms, "
+            f"min {min(values) * 1000:.1f} ms, max {max(values) * 1000:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
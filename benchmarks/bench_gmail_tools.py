@@ -0,0 +1,137 @@
+"""Benchmark the Gmail MCP tools end to end against the fake Gmail backend.
+
+Spawns gmail_mcp_server.py over stdio, exactly as mcp_client.py does, with
+its API root pointed at an in-process FakeGmail. Each tool is called a
+number of times and the report lists p50/p99 latency, throughput, and the
+Gmail round trips and response bytes each call cost.
+
+Usage:
+    python benchmarks/bench_gmail_tools.py --iterations 50 --latency-ms 20 --message-kb 256
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from bench_gmail_startup import ROOT, write_placeholder_token
+from fake_gmail import FakeGmail
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def scenarios(ids: list[str], batch_size: int) -> list[tuple[str, str, callable]]:
+    """(label, tool, arguments for iteration i). Ids are never reused, so nothing is served from cache"""
+    def batch(i):
+        return ids[i * batch_size:(i + 1) * batch_size]
+
+    return [
+        ("get_unread_emails(max_results=100)", "get_unread_emails", lambda i: {"max_results": 100}),
+        ("get_unread_emails(paginate)", "get_unread_emails", lambda i: {"page_size": 100, "paginate": True}),
+        ("sync_changes", "sync_changes", lambda i: {}),
+        ("read_email_headers", "read_email_headers", lambda i: {"email_id": ids[i]}),
+        ("read_email", "read_email", lambda i: {"email_id": ids[-1 - i]}),
+        (f"read_emails({batch_size})", "read_emails", lambda i: {"email_ids": batch(i)}),
+        ("mark_email_as_read", "mark_email_as_read", lambda i: {"email_id": ids[i]}),
+        (f"mark_emails_as_read({batch_size})", "mark_emails_as_read", lambda i: {"email_ids": batch(i)}),
+        ("send_email", "send_email", lambda i: {"recipient_id": "you@example.com", "subject": "Bench", "message": "Hi"}),
+        ("trash_email", "trash_email", lambda i: {"email_id": ids[i]}),
+    ]
+
+
+async def run_scenario(session: ClientSession, fake: FakeGmail, tool: str, make_args, iterations: int,
+                       concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(i):
+        async with semaphore:
+            start = time.perf_counter()
+            result = await session.call_tool(tool, arguments=make_args(i))
+            latencies.append(time.perf_counter() - start)
+            if result.isError:
+                raise RuntimeError(f"{tool} failed: {result.content}")
+
+    before = fake.snapshot()
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(iterations)))
+    elapsed = time.perf_counter() - start
+    after = fake.snapshot()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "calls_per_s": iterations / elapsed,
+        "requests_per_call": (after["requests"] - before["requests"]) / iterations,
+        "kb_per_call": (after["bytes_out"] - before["bytes_out"]) / iterations / 1024,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Gmail MCP tools benchmark')
+    parser.add_argument('--iterations', type=int, default=20, help='Calls per tool')
+    parser.add_argument('--concurrency', type=int, default=1, help='Calls in flight at once')
+    parser.add_argument('--batch-size', type=int, default=50, help='Ids per call for the bulk tools')
+    parser.add_argument('--latency-ms', type=float, default=10.0, help='Latency added by the fake backend per request')
+    parser.add_argument('--message-kb', type=int, default=64, help='Attachment size of every fake message')
+    parser.add_argument('--page-size', type=int, default=500, help='Largest page the fake backend returns')
+    parser.add_argument('--tools', nargs='*', help='Only run scenarios whose label starts with one of these')
+    parser.add_argument('--json', help='Write the results to this file as JSON')
+    args = parser.parse_args()
+
+    messages = max(1000, args.iterations * args.batch_size * 2)
+    fake = FakeGmail(messages=messages, message_kb=args.message_kb, max_page_size=args.page_size,
+                     latency_ms=args.latency_ms).start()
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            token_path = os.path.join(tmp, "token.json")
+            write_placeholder_token(token_path)
+            server_params = StdioServerParameters(
+                command=sys.executable,
+                args=[
+                    os.path.join(ROOT, "gmail_mcp_server.py"),
+                    "--creds-file-path", os.path.join(ROOT, "credentials.json"),
+                    "--token-path", token_path,
+                    "--api-root-url", fake.root_url,
+                    "--cache-path", "",
+                    "--index-path", "",
+                    "--cache-memory-mb", "0",
+                    "--quota-units-per-second", "1000000",
+                    "--send-rate", "1000000",
+                ],
+                cwd=ROOT,
+            )
+            async with stdio_client(server_params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    for label, tool, make_args in scenarios(fake.ids, args.batch_size):
+                        if args.tools and not any(label.startswith(t) for t in args.tools):
+                            continue
+                        results[label] = await run_scenario(
+                            session, fake, tool, make_args, args.iterations, args.concurrency
+                        )
+    finally:
+        fake.stop()
+
+    print(f"{'tool':<36}{'p50 ms':>10}{'p99 ms':>10}{'calls/s':>10}{'reqs/call':>11}{'KB/call':>10}")
+    for label, r in results.items():
+        print(
+            f"{label:<36}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['calls_per_s']:>10.1f}"
+            f"{r['requests_per_call']:>11.2f}{r['kb_per_call']:>10.1f}"
+        )
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
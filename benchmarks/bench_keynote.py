@@ -0,0 +1,93 @@
+"""Benchmark the batched Keynote backend against the old one process per action.
+
+Runs on any platform: the old path is reproduced by spawning one process
+per script (as osascript was) followed by the fixed sleep, blocking the
+event loop as the old tools did, and the new path sends the same tool
+calls through keynote_tools.RecordingBackend. Both add --script-ms per
+script for the work Keynote itself would do. Reported are throughput and
+the longest the event loop went without running, measured by a ticker.
+
+Usage:
+    python benchmarks/bench_keynote.py --actions 50 --concurrency 10 --legacy-sleep 1.0
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import keynote_tools  # noqa: E402
+
+
+async def max_loop_stall(stop: asyncio.Event, interval: float = 0.001) -> float:
+    """Longest gap, in seconds, between two wakeups of a task sleeping interval"""
+    worst = 0.0
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        worst = max(worst, now - last - interval)
+        last = now
+    return worst
+
+
+async def legacy_draw(script_seconds: float, sleep: float) -> None:
+    # Keynote running check, then the drawing script, then the fixed sleep, all blocking
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", f"import time; time.sleep({script_seconds})"])
+    time.sleep(sleep)
+
+
+async def timed(actions: int, concurrency: int, make_call) -> tuple[float, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with semaphore:
+            await make_call()
+
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(max_loop_stall(stop))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(actions)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return elapsed, await ticker
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Keynote backend benchmark')
+    parser.add_argument('--actions', type=int, default=20, help='mac_draw_rectangle calls per run')
+    parser.add_argument('--concurrency', type=int, default=10, help='Calls in flight at once')
+    parser.add_argument('--script-ms', type=float, default=5.0, help='Simulated Keynote time per script')
+    parser.add_argument('--legacy-sleep', type=float, default=1.0, help='Fixed sleep of the old tools per action')
+    args = parser.parse_args()
+    script_seconds = args.script_ms / 1000
+
+    results = {
+        "process per script + sleep": await timed(
+            args.actions, args.concurrency, lambda: legacy_draw(script_seconds, args.legacy_sleep)
+        ),
+    }
+    keynote_tools.backend = keynote_tools.RecordingBackend(delay=script_seconds)
+    try:
+        results["batched, acknowledged"] = await timed(
+            args.actions, args.concurrency, keynote_tools.mac_draw_rectangle
+        )
+        stats = keynote_tools.backend.stats
+    finally:
+        keynote_tools.backend.close()
+
+    print(f"{args.actions} actions, concurrency {args.concurrency}, "
+          f"{stats['batches']} batches over {stats['processes']} process(es) for the batched backend")
+    print(f"{'backend':<30}{'seconds':>10}{'actions/s':>12}{'max loop stall ms':>20}")
+    for label, (elapsed, stall) in results.items():
+        print(f"{label:<30}{elapsed:>10.2f}{args.actions / elapsed:>12.1f}{stall * 1000:>20.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
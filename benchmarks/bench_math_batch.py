@@ -0,0 +1,101 @@
+"""Compare the scalar Calculator tools with batch_apply / batch_apply_binary.
+
+Applies one operation to N values, once as N scalar tool calls and once as
+a single batch call, both as direct function calls and through a real MCP
+session over stdio, where every scalar call is a JSON-RPC round trip.
+
+Usage:
+    python benchmarks/bench_math_batch.py --sizes 10 100 1000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import math_mcp_server  # noqa: E402
+
+# (scalar tool, batch tool, batch operation, arguments for N values)
+CASES = [
+    ("log", "batch_apply", "log", lambda n: ([{"a": i + 1} for i in range(n)], {"values": list(range(1, n + 1))})),
+    ("sin", "batch_apply", "sin", lambda n: ([{"a": i} for i in range(n)], {"values": list(range(n))})),
+    ("add", "batch_apply_binary", "add",
+     lambda n: ([{"a": i, "b": 7} for i in range(n)], {"a": list(range(n)), "b": [7]})),
+    ("power", "batch_apply_binary", "power",
+     lambda n: ([{"a": i, "b": 3} for i in range(n)], {"a": list(range(n)), "b": [3]})),
+]
+# The batch tools are async, direct calls time the functions behind them
+BATCH_FUNCTIONS = {
+    "batch_apply": math_mcp_server.apply_batch,
+    "batch_apply_binary": math_mcp_server.apply_batch_binary,
+}
+
+
+def time_direct(scalar: str, batch: str, operation: str, scalar_args: list[dict], batch_args: dict) -> tuple[float, float]:
+    scalar_fn = getattr(math_mcp_server, scalar)
+    batch_fn = BATCH_FUNCTIONS[batch]
+    # The tools print a line per call, keep that out of the timings' output
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for args in scalar_args:
+            scalar_fn(**args)
+        scalar_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        batch_fn(operation, **batch_args)
+        batch_seconds = time.perf_counter() - start
+    return scalar_seconds, batch_seconds
+
+
+async def time_stdio(session: ClientSession, scalar: str, batch: str, operation: str,
+                     scalar_args: list[dict], batch_args: dict) -> tuple[float, float]:
+    start = time.perf_counter()
+    for args in scalar_args:
+        await session.call_tool(scalar, arguments=args)
+    scalar_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    await session.call_tool(batch, arguments={"operation": operation, **batch_args})
+    batch_seconds = time.perf_counter() - start
+    return scalar_seconds, batch_seconds
+
+
+def report(mode: str, name: str, n: int, scalar_seconds: float, batch_seconds: float) -> None:
+    print(
+        f"{mode:<7}{name:<8}{n:>8}{scalar_seconds * 1000:>14.2f}{batch_seconds * 1000:>14.2f}"
+        f"{scalar_seconds / batch_seconds:>10.1f}x"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Scalar vs batch Calculator tools benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help='Number of values per run')
+    parser.add_argument('--no-stdio', action='store_true', help='Only time direct function calls')
+    args = parser.parse_args()
+
+    print(f"{'mode':<7}{'tool':<8}{'n':>8}{'scalar ms':>14}{'batch ms':>14}{'speedup':>11}")
+    for scalar, batch, operation, make_args in CASES:
+        for n in args.sizes:
+            report("direct", scalar, n, *time_direct(scalar, batch, operation, *make_args(n)))
+
+    if args.no_stdio:
+        return
+    server_params = StdioServerParameters(
+        command=sys.executable, args=[os.path.join(ROOT, "math_mcp_server.py")], cwd=ROOT
+    )
+    async with stdio_client(server_params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for scalar, batch, operation, make_args in CASES:
+                for n in args.sizes:
+                    report("stdio", scalar, n, *await time_stdio(session, scalar, batch, operation, *make_args(n)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
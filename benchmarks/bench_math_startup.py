@@ -0,0 +1,69 @@
+"""Startup benchmark for the Calculator MCP server, based on python -X importtime.
+
+Imports math_mcp_server in fresh interpreters under -X importtime and
+reports the median total import time with the modules that cost the most,
+cumulatively, including the plugins and what they pull in. --plugins
+selects the optional tool groups through MATH_MCP_PLUGINS.
+
+Usage:
+    python benchmarks/bench_math_startup.py --runs 10 --top 15
+    python benchmarks/bench_math_startup.py --plugins none
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(plugins: str | None) -> dict[str, tuple[int, int]]:
+    """Import math_mcp_server once, return module -> (self us, cumulative us)"""
+    env = dict(os.environ)
+    if plugins is not None:
+        env["MATH_MCP_PLUGINS"] = plugins
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import math_mcp_server"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        sys.exit(result.stderr)
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        times[module.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Calculator MCP server import time benchmark')
+    parser.add_argument('--runs', type=int, default=10, help='Number of fresh interpreters to time')
+    parser.add_argument('--top', type=int, default=15, help='Number of slowest modules to list')
+    parser.add_argument('--plugins', help='Value for MATH_MCP_PLUGINS, e.g. "imaging" or "none"')
+    args = parser.parse_args()
+
+    cumulative = defaultdict(list)
+    totals = []
+    for _ in range(args.runs):
+        times = import_times(args.plugins)
+        totals.append(times["math_mcp_server"][1])
+        for module, (_, cumulative_us) in times.items():
+            cumulative[module].append(cumulative_us)
+
+    print(f"import math_mcp_server: median {statistics.median(totals) / 1000:.1f} ms, "
+          f"min {min(totals) / 1000:.1f} ms, max {max(totals) / 1000:.1f} ms over {args.runs} runs")
+    print(f"{'module':<48}{'cumulative ms':>15}")
+    slowest = sorted(cumulative.items(), key=lambda item: -statistics.median(item[1]))
+    for module, values in slowest[:args.top]:
+        print(f"{module:<48}{statistics.median(values) / 1000:>15.1f}")
+    for heavy in ("numpy", "PIL", "PIL.Image", "AppKit"):
+        print(f"{heavy} imported at startup: {'yes' if heavy in cumulative else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Benchmark every core Calculator tool, in process and over stdio, with regression baselines.
+
+Each tool is called on a sweep of input sizes, once as a direct function
+call and once through a real MCP ClientSession talking to
+math_mcp_server.py over stdio. Arguments change a little on every
+iteration, so the memoized tools are measured on cache misses. The report
+lists ops/s and p50/p99 latency for both paths, and the JSON-RPC overhead:
+the p50 difference between them. For the tools that run in the worker
+pool, that overhead includes the pool round trip.
+
+--save-baseline stores the p50 latencies in --baseline. Later runs compare
+against that file and exit with status 1 when a tool's p50 grew by more
+than --threshold, ignoring differences below --min-ms. Baselines only
+compare runs on the same machine.
+
+Usage:
+    python benchmarks/bench_math_tools.py --save-baseline
+    python benchmarks/bench_math_tools.py --threshold 0.25 --tools factorial fibonacci_numbers
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import math_mcp_server  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "math_tools.json")
+
+
+def digits(n: int, i: int) -> int:
+    """An n digit number that changes with i"""
+    return 10 ** (n - 1) + i
+
+
+def cases(data_dir: str) -> list[tuple[str, str, list[int], callable]]:
+    """(tool, function called directly, sizes, arguments for size n and iteration i)"""
+    random.seed(0)
+    exponents = [random.randint(0, 699) for _ in range(100000)]
+
+    def dataset(n: int) -> str:
+        path = os.path.join(data_dir, f"values_{n}.npy")
+        if not os.path.exists(path):
+            import numpy as np
+            np.save(path, np.random.default_rng(0).random(n))
+        return path
+
+    return [
+        ("add", "add", [1, 100, 1000], lambda n, i: {"a": digits(n, i), "b": 7}),
+        ("subtract", "subtract", [1, 1000], lambda n, i: {"a": digits(n, i), "b": 7}),
+        ("multiply", "multiply", [1, 100, 1000], lambda n, i: {"a": digits(n, i), "b": digits(n, 3)}),
+        ("divide", "divide", [1], lambda n, i: {"a": i + 10, "b": 3}),
+        ("remainder", "remainder", [1, 1000], lambda n, i: {"a": digits(n, i), "b": 97}),
+        ("mine", "mine", [1], lambda n, i: {"a": i + 10, "b": 3}),
+        ("power", "power", [10, 1000, 100000], lambda n, i: {"a": 3, "b": n + i}),
+        ("sqrt", "sqrt", [1], lambda n, i: {"a": i + 1}),
+        ("cbrt", "cbrt", [1], lambda n, i: {"a": i + 1}),
+        ("log", "log", [1], lambda n, i: {"a": i + 1}),
+        ("sin", "sin", [1], lambda n, i: {"a": i}),
+        ("cos", "cos", [1], lambda n, i: {"a": i}),
+        ("tan", "tan", [1], lambda n, i: {"a": i}),
+        ("factorial", "factorial", [10, 1000, 10000], lambda n, i: {"a": n + i}),
+        ("add_list", "add_list", [10, 1000, 100000], lambda n, i: {"l": list(range(i, i + n))}),
+        ("strings_to_chars_to_int", "strings_to_chars_to_int", [5, 1000, 100000],
+         lambda n, i: {"string": ("INDIA" * (n // 5 + 1))[:n - 1] + chr(65 + i % 26)}),
+        ("int_list_to_exponential_sum", "int_list_to_exponential_sum", [5, 1000, 100000],
+         lambda n, i: {"int_list": exponents[:n - 1] + [i % 700]}),
+        ("fibonacci_nth", "fibonacci_nth", [10, 10000, 1000000], lambda n, i: {"n": n + i}),
+        # The largest size is a full page, shrunk by the few indexes start moves it along
+        ("fibonacci_numbers", "fibonacci_numbers", [10, 1000, math_mcp_server.MAX_FIBONACCI_WINDOW],
+         lambda n, i: {"n": min(n, math_mcp_server.fibonacci_window(i)), "start": i}),
+        ("batch_apply", "apply_batch", [10, 1000, 100000],
+         lambda n, i: {"operation": "sqrt", "values": list(range(i, i + n))}),
+        ("batch_apply_binary", "apply_batch_binary", [10, 1000, 100000],
+         lambda n, i: {"operation": "add", "a": list(range(i, i + n)), "b": [7]}),
+        ("evaluate", "evaluate_expression", [1],
+         lambda n, i: {"expression": f'int_list_to_exponential_sum(strings_to_chars_to_int("INDIA")) + {i}'}),
+        ("dataset_reduce", "reduce_dataset", [1000, 1000000], lambda n, i: {"path": dataset(n), "reduction": "summary"}),
+        ("get_cache_stats", "get_cache_stats", [1], lambda n, i: {}),
+    ]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies: list[float]) -> dict:
+    return {
+        "ops_per_s": len(latencies) / sum(latencies),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def iterations_within(iterations: int, max_seconds: float, latencies: list[float]) -> bool:
+    """Keep going until iterations calls, or max_seconds but at least three calls"""
+    return len(latencies) < iterations and (len(latencies) < 3 or sum(latencies) < max_seconds)
+
+
+def time_direct(function: str, n: int, make_args, iterations: int, max_seconds: float) -> dict:
+    fn = getattr(math_mcp_server, function)
+    latencies = []
+    # The tools print a line per call, keep that out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        while iterations_within(iterations, max_seconds, latencies):
+            args = make_args(n, len(latencies))
+            start = time.perf_counter()
+            fn(**args)
+            latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+async def time_stdio(session: ClientSession, tool: str, n: int, make_args, iterations: int,
+                     max_seconds: float) -> dict:
+    latencies = []
+    while iterations_within(iterations, max_seconds, latencies):
+        # Offset so the server's caches miss on arguments the direct run already used
+        args = make_args(n, len(latencies) + iterations)
+        start = time.perf_counter()
+        result = await session.call_tool(tool, arguments=args)
+        latencies.append(time.perf_counter() - start)
+        if result.isError:
+            raise RuntimeError(f"{tool}({n}) failed: {result.content}")
+    return summarize(latencies)
+
+
+def check_baseline(results: dict, baseline: dict, threshold: float, min_ms: float) -> list[str]:
+    """Describe every p50 that grew past threshold (and min_ms) over the baseline"""
+    regressions = []
+    for key, result in results.items():
+        for path in ("direct", "stdio"):
+            before = baseline.get(key, {}).get(path)
+            now = result[path]["p50_ms"]
+            if before is not None and now - before > max(threshold * before, min_ms):
+                regressions.append(f"{key} {path}: p50 {before:.3f} ms -> {now:.3f} ms (+{(now / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Calculator tools benchmark')
+    parser.add_argument('--iterations', type=int, default=20, help='Calls per tool and size')
+    parser.add_argument('--max-seconds', type=float, default=5.0, help='Stop a measurement after this long')
+    parser.add_argument('--tools', nargs='*', help='Only benchmark these tools')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline file to compare with or save to')
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed p50 growth, 0.25 is 25%%')
+    parser.add_argument('--min-ms', type=float, default=0.1, help='Ignore p50 growth below this many ms')
+    parser.add_argument('--json', help='Write the results to this file as JSON')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        selected = [c for c in cases(data_dir) if not args.tools or c[0] in args.tools]
+        for tool, function, sizes, make_args in selected:
+            for n in sizes:
+                results[f"{tool}[{n}]"] = {
+                    "direct": time_direct(function, n, make_args, args.iterations, args.max_seconds)
+                }
+
+        server_params = StdioServerParameters(
+            command=sys.executable,
+            args=[os.path.join(ROOT, "math_mcp_server.py")],
+            cwd=ROOT,
+            env=dict(os.environ, MATH_MCP_PLUGINS="none"),
+        )
+        async with stdio_client(server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                for tool, function, sizes, make_args in selected:
+                    for n in sizes:
+                        results[f"{tool}[{n}]"]["stdio"] = await time_stdio(
+                            session, tool, n, make_args, args.iterations, args.max_seconds
+                        )
+
+    print(f"{'tool[size]':<36}{'direct ops/s':>13}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'stdio ops/s':>13}{'p50 ms':>10}{'p99 ms':>10}{'rpc ms':>10}")
+    for key, r in results.items():
+        direct, stdio = r["direct"], r["stdio"]
+        r["rpc_overhead_ms"] = stdio["p50_ms"] - direct["p50_ms"]
+        print(
+            f"{key:<36}{direct['ops_per_s']:>13.1f}{direct['p50_ms']:>10.3f}{direct['p99_ms']:>10.3f}"
+            f"{stdio['ops_per_s']:>13.1f}{stdio['p50_ms']:>10.3f}{stdio['p99_ms']:>10.3f}{r['rpc_overhead_ms']:>10.3f}"
+        )
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        # Runs of a few tools only replace those tools' entries
+        baseline.update({key: {path: r[path]["p50_ms"] for path in ("direct", "stdio")} for key, r in results.items()})
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}, run with --save-baseline to create one")
+        return
+    with open(args.baseline) as f:
+        regressions = check_baseline(results, json.load(f), args.threshold, args.min_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
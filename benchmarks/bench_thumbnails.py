@@ -0,0 +1,92 @@
+"""Benchmark create_thumbnail's pipeline over a directory of large photos.
+
+Times, per image, the old approach (full decode, thumbnail(), raw pixels),
+a cold make_thumbnail (draft decode and real encoding into an empty cache)
+and a warm one (served from the disk cache). Without --directory a set of
+synthetic 24 megapixel JPEGs is generated first.
+
+Usage:
+    python benchmarks/bench_thumbnails.py --directory ~/Pictures --size 256 --format webp
+"""
+import argparse
+import glob
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import imaging_tools  # noqa: E402
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.JPG", "*.JPEG", "*.png", "*.PNG", "*.webp")
+
+
+def generate_photos(directory: str, count: int, width: int = 6000, height: int = 4000) -> list[str]:
+    """Write count noisy JPEGs, noise keeps the encoder from making them tiny"""
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"photo_{i:03d}.jpg")
+        Image.effect_noise((width, height), 40 + i).convert("RGB").save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def old_thumbnail(path: str, size: int) -> bytes:
+    img = Image.open(path)
+    img.thumbnail((size, size))
+    return img.tobytes()
+
+
+def time_each(fn, paths: list[str]) -> list[float]:
+    seconds = []
+    for path in paths:
+        start = time.perf_counter()
+        fn(path)
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Thumbnail pipeline benchmark')
+    parser.add_argument('--directory', help='Directory of photos, synthetic ones are generated when omitted')
+    parser.add_argument('--count', type=int, default=10, help='Number of synthetic photos')
+    parser.add_argument('--size', type=int, default=100, help='Thumbnail size')
+    parser.add_argument('--format', default='png', choices=sorted(imaging_tools.THUMBNAIL_FORMATS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.directory:
+            directory = os.path.expanduser(args.directory)
+            paths = sorted({p for pattern in IMAGE_PATTERNS for p in glob.glob(os.path.join(directory, pattern))})
+        else:
+            paths = generate_photos(tmp, args.count)
+        if not paths:
+            sys.exit(f"No images found in {args.directory}")
+        cache_dir = os.path.join(tmp, "cache")
+
+        def new_thumbnail(path):
+            return imaging_tools.make_thumbnail(path, args.size, args.format, cache_dir)
+
+        results = {
+            "old (full decode, raw pixels)": time_each(lambda p: old_thumbnail(p, args.size), paths),
+            f"cold (draft decode, {args.format})": time_each(new_thumbnail, paths),
+            "warm (disk cache)": time_each(new_thumbnail, paths),
+        }
+        thumbnail_bytes = sum(os.path.getsize(new_thumbnail(p)) for p in paths)
+
+    print(f"{len(paths)} images, size {args.size}, {thumbnail_bytes / len(paths) / 1024:.1f} KB per thumbnail")
+    print(f"{'pipeline':<34}{'mean ms':>10}{'p50 ms':>10}{'max ms':>10}{'images/s':>10}")
+    for label, seconds in results.items():
+        print(
+            f"{label:<34}{statistics.mean(seconds) * 1000:>10.1f}{statistics.median(seconds) * 1000:>10.1f}"
+            f"{max(seconds) * 1000:>10.1f}{len(seconds) / sum(seconds):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""In-process fake of the Gmail REST API for benchmarks.
+
+Serves the subset of users.* endpoints that gmail_mcp_server.py uses,
+including multipart batch requests, from a synthetic mailbox. Latency,
+page size and message size are configurable, and every round trip is
+counted so benchmarks can report requests and bytes per tool call.
+
+Point the server at it with:
+    python gmail_mcp_server.py ... --api-root-url http://127.0.0.1:<port>/
+"""
+import base64
+import json
+import re
+import threading
+import time
+from email.message import EmailMessage
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+BATCH_BOUNDARY = "fake_gmail_batch_boundary"
+
+
+class FakeGmail:
+    """Synthetic mailbox served over HTTP on a background thread"""
+
+    def __init__(self, messages: int = 1000, message_kb: int = 64, max_page_size: int = 500,
+                 latency_ms: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.message_count = messages
+        self.message_kb = message_kb
+        self.max_page_size = max_page_size
+        self.latency = latency_ms / 1000
+        self.ids = [f"{i:016x}" for i in range(messages)]
+        self.labels = {message_id: {"INBOX", "UNREAD", "CATEGORY_PERSONAL"} for message_id in self.ids}
+        self.raw = {}
+        self.history_id = 1000
+        self.sent = 0
+        self.lock = threading.Lock()
+        # requests: HTTP round trips, of which batch_requests were multipart batches;
+        # calls: API calls, batched ones included, of which batch_modify were messages.batchModify
+        self.counters = {"requests": 0, "calls": 0, "batch_requests": 0, "batch_modify": 0, "bytes_in": 0, "bytes_out": 0}
+
+        handler = type("Handler", (FakeGmailHandler,), {"fake": self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def root_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "FakeGmail":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def snapshot(self) -> dict[str, int]:
+        """Return a copy of the round trip and byte counters"""
+        with self.lock:
+            return dict(self.counters)
+
+    def message_raw(self, message_id: str) -> str:
+        """Build (once) the base64url encoded RFC 2822 message for an id"""
+        with self.lock:
+            raw = self.raw.get(message_id)
+        if raw is None:
+            message = EmailMessage()
+            message["Subject"] = f"Message {message_id}"
+            message["From"] = "sender@example.com"
+            message["To"] = "me@example.com"
+            message["Date"] = "Fri, 16 Oct 2026 09:00:00 +0000"
+            message.set_content(f"Body of message {message_id}\n")
+            message.add_attachment(
+                b"\0" * (self.message_kb * 1024), maintype="application", subtype="octet-stream",
+                filename="attachment.bin",
+            )
+            raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
+            with self.lock:
+                self.raw[message_id] = raw
+        return raw
+
+    def dispatch(self, method: str, path: str, query: dict[str, list[str]], body: bytes) -> tuple[int, dict | None]:
+        """Answer one Gmail API call with a status and JSON body"""
+        with self.lock:
+            self.counters["calls"] += 1
+        match = re.search(r"gmail/v1/users/[^/]+/(.*)$", path)
+        if not match:
+            return 404, error_body(404, f"Unknown path {path}")
+        route = match.group(1)
+        payload = json.loads(body) if body else {}
+
+        if route == "profile":
+            return 200, {"emailAddress": "me@example.com", "historyId": str(self.history_id)}
+        if route == "history":
+            return 200, {"historyId": str(self.history_id)}
+        if route == "messages" and method == "GET":
+            offset = int(query.get("pageToken", ["0"])[0])
+            size = min(int(query.get("maxResults", ["100"])[0]), self.max_page_size)
+            with self.lock:
+                unread = [i for i in self.ids if "UNREAD" in self.labels[i]]
+            page = unread[offset:offset + size]
+            response = {"messages": [{"id": i, "threadId": i} for i in page]}
+            if offset + size < len(unread):
+                response["nextPageToken"] = str(offset + size)
+            return 200, response
+        if route == "messages/send":
+            with self.lock:
+                self.sent += 1
+                message_id = f"sent{self.sent:012x}"
+            return 200, {"id": message_id, "threadId": message_id, "labelIds": ["SENT"]}
+        if route == "messages/batchModify":
+            with self.lock:
+                self.counters["batch_modify"] += 1
+                for message_id in payload.get("ids", []):
+                    if message_id in self.labels:
+                        self.labels[message_id] |= set(payload.get("addLabelIds", []))
+                        self.labels[message_id] -= set(payload.get("removeLabelIds", []))
+            return 204, None
+
+        match = re.fullmatch(r"messages/([^/]+)(?:/(modify|trash))?", route)
+        if not match or match.group(1) not in self.labels:
+            return 404, error_body(404, "Requested entity was not found.")
+        message_id, action = match.groups()
+        with self.lock:
+            if action == "modify":
+                self.labels[message_id] |= set(payload.get("addLabelIds", []))
+                self.labels[message_id] -= set(payload.get("removeLabelIds", []))
+            elif action == "trash":
+                self.labels[message_id] = {"TRASH"}
+            labels = sorted(self.labels[message_id])
+        message = {"id": message_id, "threadId": message_id, "labelIds": labels, "historyId": str(self.history_id)}
+        if action is None:
+            message_format = query.get("format", ["full"])[0]
+            if message_format == "raw":
+                message["raw"] = self.message_raw(message_id)
+            elif message_format == "metadata":
+                wanted = {h.lower() for h in query.get("metadataHeaders", [])}
+                headers = [
+                    {"name": "Subject", "value": f"Message {message_id}"},
+                    {"name": "From", "value": "sender@example.com"},
+                    {"name": "To", "value": "me@example.com"},
+                    {"name": "Date", "value": "Fri, 16 Oct 2026 09:00:00 +0000"},
+                ]
+                message["payload"] = {"headers": [h for h in headers if not wanted or h["name"].lower() in wanted]}
+        return 200, message
+
+    def dispatch_batch(self, content_type: str, body: bytes) -> bytes:
+        """Answer a multipart/mixed batch request"""
+        envelope = BytesParser().parsebytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+        parts = []
+        for part in envelope.get_payload():
+            request = part.get_payload()
+            if isinstance(request, list):
+                request = request[0].as_string()
+            head, _, sub_body = request.partition("\r\n\r\n") if "\r\n\r\n" in request else request.partition("\n\n")
+            method, uri = head.splitlines()[0].split(" ")[:2]
+            url = urlsplit(uri)
+            status, response = self.dispatch(method, url.path, parse_qs(url.query), sub_body.strip().encode())
+            content = json.dumps(response) if response is not None else ""
+            parts.append(
+                f"--{BATCH_BOUNDARY}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'][1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{content}\r\n"
+            )
+        return ("".join(parts) + f"--{BATCH_BOUNDARY}--\r\n").encode()
+
+
+class FakeGmailHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, as against Google
+    fake: FakeGmail
+
+    def do_GET(self):
+        self.handle_call()
+
+    def do_POST(self):
+        self.handle_call()
+
+    def handle_call(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+
+        url = urlsplit(self.path)
+        # The bundled discovery document's batchPath is "batch", the live one "batch/gmail/v1"
+        batch = url.path.rstrip("/") in ("/batch", "/batch/gmail/v1")
+        if batch:
+            status, content_type = 200, f"multipart/mixed; boundary={BATCH_BOUNDARY}"
+            content = self.fake.dispatch_batch(self.headers["Content-Type"], body)
+        else:
+            status, response = self.fake.dispatch(self.command, url.path, parse_qs(url.query), body)
+            content_type = "application/json; charset=UTF-8"
+            content = json.dumps(response).encode() if response is not None else b""
+
+        with self.fake.lock:
+            self.fake.counters["requests"] += 1
+            self.fake.counters["batch_requests"] += batch
+            self.fake.counters["bytes_in"] += len(body)
+            self.fake.counters["bytes_out"] += len(content)
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def error_body(code: int, message: str) -> dict:
+    return {"error": {"code": code, "message": message, "errors": [{"message": message, "reason": "notFound"}]}}
@@ -11,6 +11,14 @@ from email import message_from_bytes
 import webbrowser
 import sys
 import json
+import itertools
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from mcp.server.fastmcp import FastMCP, Image
 from mcp.server.fastmcp.prompts import base
@@ -21,14 +29,63 @@ import mcp.types as types
 from mcp.server import NotificationOptions, Server
 import mcp.server.stdio
 
+import httplib2
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
 
+from mcp_metrics import instrument
+
 # Define the scopes for Gmail API access
 SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
+# Scope required by messages.batchDelete, requested on top of SCOPES with --full-access
+FULL_ACCESS_SCOPE = 'https://mail.google.com/'
+
+# Gmail accepts up to 100 calls per batch request but recommends no more than 50
+BATCH_REQUEST_SIZE = 50
+# Maximum number of ids accepted by messages.batchModify / batchDelete
+BATCH_MODIFY_SIZE = 1000
+# messages.list returns at most 500 ids per page
+MAX_PAGE_SIZE = 500
+# Unread messages get_unread_emails returns unless asked for more, 0 lists the whole mailbox
+DEFAULT_UNREAD_RESULTS = 100
+# Only ask for the fields we use when listing messages
+LIST_FIELDS = 'messages(id,threadId),nextPageToken'
+# Gmail allows 250 quota units per user per second and messages.send costs 100
+SEND_RATE = 2.5
+# Socket timeout in seconds for Gmail API connections
+HTTP_TIMEOUT = 60
+QUOTA_UNITS_PER_SECOND = 250
+# Quota cost of each Gmail API method, anything not listed costs DEFAULT_QUOTA_UNITS
+QUOTA_UNITS = {
+    'gmail.users.getProfile': 1,
+    'gmail.users.history.list': 2,
+    'gmail.users.messages.list': 5,
+    'gmail.users.messages.get': 5,
+    'gmail.users.messages.modify': 5,
+    'gmail.users.messages.trash': 5,
+    'gmail.users.messages.batchModify': 50,
+    'gmail.users.messages.batchDelete': 50,
+    'gmail.users.messages.send': 100,
+}
+DEFAULT_QUOTA_UNITS = 5
+# Retry settings for rate limited and failed Gmail requests
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+MAX_BACKOFF = 32
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Headers returned by read_email_headers when the caller does not pick any
+DEFAULT_HEADERS = ['Subject', 'From', 'To', 'Date']
+METADATA_FIELDS = 'id,payload/headers'
+UNREAD_QUERY = 'in:inbox is:unread category:primary'
+# Labels a message must carry to match UNREAD_QUERY, used by the incremental sync
+UNREAD_LABELS = {'INBOX', 'UNREAD', 'CATEGORY_PERSONAL'}
+# Most ids bound into one SQLite IN (...) lookup, older SQLite builds allow 999 variables
+SQLITE_MAX_VARIABLES = 500
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -36,99 +93,489 @@ logger = logging.getLogger(__name__)
 
 # Create MCP server instance
 mcp = FastMCP("Gmail")
+# Prefixes of the messages tools return instead of raising on failure
+ERROR_RESULT_PREFIXES = ("An HttpError occurred", "An error occurred")
+
+def is_error_result(result) -> bool:
+    """Whether a tool result is a returned failure rather than data"""
+    if isinstance(result, str):
+        return result.startswith(ERROR_RESULT_PREFIXES)
+    return isinstance(result, dict) and result.get("status") == "error"
+
+# Record per-tool metrics, served as the metrics://tools resource
+metrics = instrument(mcp, is_error_result=is_error_result)
+
+class MessageCache:
+    """Two-tier cache of parsed messages keyed by message id.
+
+    A bounded in-memory LRU sits in front of an optional SQLite store. Both
+    tiers are limited by the byte size of the cached payloads. Message content
+    never changes, so an entry is only dropped when it is evicted or explicitly
+    invalidated, e.g. by the history sync when the message is deleted. Every
+    call writes to SQLite in one transaction, callers run them off the event loop.
+    """
+    def __init__(self, path: str | None = None, memory_bytes: int = 32 * 2**20, disk_bytes: int = 256 * 2**20):
+        self.max_memory_bytes = memory_bytes
+        self.max_disk_bytes = disk_bytes
+        self.memory = OrderedDict()  # id -> (history_id, payload)
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.hits = {'memory': 0, 'disk': 0}
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS messages "
+                "(id TEXT PRIMARY KEY, history_id INTEGER, payload TEXT, size INTEGER, accessed REAL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS messages_accessed ON messages (accessed)")
+            self.db.commit()
+            self.disk_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM messages").fetchone()[0]
+
+    def get(self, email_id: str) -> dict[str, str] | None:
+        """Return the cached message, or None on a miss"""
+        return self.get_many([email_id]).get(email_id)
+
+    def get_many(self, email_ids: list[str]) -> dict[str, dict[str, str]]:
+        """Return the cached messages among email_ids, touching the disk hits in one transaction"""
+        entries = {}
+        with self.lock:
+            for email_id in email_ids:
+                entry = self.memory.get(email_id)
+                if entry is not None:
+                    self.memory.move_to_end(email_id)
+                    entries[email_id] = entry
+            self.hits['memory'] += len(entries)
+            missing = [i for i in email_ids if i not in entries]
+            if self.db is not None and missing:
+                disk_hits = []
+                for start in range(0, len(missing), SQLITE_MAX_VARIABLES):
+                    chunk = missing[start:start + SQLITE_MAX_VARIABLES]
+                    disk_hits += self.db.execute(
+                        f"SELECT id, history_id, payload FROM messages WHERE id IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                if disk_hits:
+                    now = time.time()
+                    self.db.executemany(
+                        "UPDATE messages SET accessed = ? WHERE id = ?", [(now, row[0]) for row in disk_hits]
+                    )
+                    self.db.commit()
+                for email_id, history_id, payload in disk_hits:
+                    entries[email_id] = (history_id, payload)
+                    self._remember(email_id, entries[email_id])
+                self.hits['disk'] += len(disk_hits)
+            self.misses += len(email_ids) - len(entries)
+        return {email_id: json.loads(entry[1]) for email_id, entry in entries.items()}
+
+    def put(self, email_id: str, history_id: int, message: dict[str, str]) -> None:
+        """Store a parsed message in both tiers"""
+        self.put_many([(email_id, history_id, message)])
+
+    def put_many(self, messages: list[tuple[str, int, dict[str, str]]]) -> None:
+        """Store (id, history id, parsed message) tuples in both tiers, in one transaction"""
+        payloads = [(email_id, history_id, json.dumps(message)) for email_id, history_id, message in messages]
+        with self.lock:
+            for email_id, history_id, payload in payloads:
+                self._remember(email_id, (history_id, payload))
+            if self.db is None or not payloads:
+                return
+            now = time.time()
+            for email_id, history_id, payload in payloads:
+                size = len(payload.encode())
+                old = self.db.execute("SELECT size FROM messages WHERE id = ?", (email_id,)).fetchone()
+                self.db.execute(
+                    "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?)",
+                    (email_id, history_id, payload, size, now),
+                )
+                self.disk_bytes += size - (old[0] if old else 0)
+            while self.disk_bytes > self.max_disk_bytes:
+                row = self.db.execute("SELECT id, size FROM messages ORDER BY accessed LIMIT 1").fetchone()
+                if row is None:
+                    break
+                self.db.execute("DELETE FROM messages WHERE id = ?", (row[0],))
+                self.disk_bytes -= row[1]
+            self.db.commit()
+
+    def invalidate(self, email_ids: list[str]) -> None:
+        """Drop messages from both tiers"""
+        with self.lock:
+            for email_id in email_ids:
+                entry = self.memory.pop(email_id, None)
+                if entry is not None:
+                    self.memory_bytes -= len(entry[1])
+                if self.db is not None:
+                    row = self.db.execute("SELECT size FROM messages WHERE id = ?", (email_id,)).fetchone()
+                    if row is not None:
+                        self.db.execute("DELETE FROM messages WHERE id = ?", (email_id,))
+                        self.disk_bytes -= row[0]
+            if self.db is not None:
+                self.db.commit()
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and tier sizes"""
+        with self.lock:
+            hits = self.hits['memory'] + self.hits['disk']
+            lookups = hits + self.misses
+            disk_entries = 0
+            if self.db is not None:
+                disk_entries = self.db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+            return {
+                "memory_hits": self.hits['memory'],
+                "disk_hits": self.hits['disk'],
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "memory_bytes": self.memory_bytes,
+                "disk_entries": disk_entries,
+                "disk_bytes": self.disk_bytes,
+            }
+
+    def _remember(self, email_id: str, entry: tuple[int, str]) -> None:
+        """Insert into the in-memory LRU, evicting least recently used entries"""
+        old = self.memory.pop(email_id, None)
+        if old is not None:
+            self.memory_bytes -= len(old[1])
+        if len(entry[1]) > self.max_memory_bytes:
+            return
+        self.memory[email_id] = entry
+        self.memory_bytes += len(entry[1])
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted[1])
+
+# Memory-only until main() configures the on-disk store
+message_cache = MessageCache()
+
+class SearchIndex:
+    """Local SQLite FTS5 index over the subject, sender and plain-text body of fetched emails.
+
+    Filled as messages are read, so searching them again needs no network.
+    """
+    def __init__(self, path: str = ':memory:'):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        # FTS5 rows are keyed by rowid, docs maps Gmail ids onto them
+        self.db.execute("CREATE TABLE IF NOT EXISTS docs (rowid INTEGER PRIMARY KEY, id TEXT UNIQUE)")
+        self.db.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS emails USING fts5(subject, sender, date UNINDEXED, body)"
+        )
+        self.db.commit()
+
+    def add(self, email_id: str, message: dict[str, str]) -> None:
+        """Index or re-index a parsed message"""
+        self.add_many([(email_id, message)])
+
+    def add_many(self, messages: list[tuple[str, dict[str, str]]]) -> None:
+        """Index or re-index (id, parsed message) pairs in one transaction"""
+        with self.lock:
+            for email_id, message in messages:
+                self.db.execute("INSERT OR IGNORE INTO docs (id) VALUES (?)", (email_id,))
+                rowid = self.db.execute("SELECT rowid FROM docs WHERE id = ?", (email_id,)).fetchone()[0]
+                self.db.execute("DELETE FROM emails WHERE rowid = ?", (rowid,))
+                self.db.execute(
+                    "INSERT INTO emails (rowid, subject, sender, date, body) VALUES (?, ?, ?, ?, ?)",
+                    (rowid, message.get('subject', ''), message.get('from', ''),
+                     message.get('date', ''), message.get('content') or ''),
+                )
+            self.db.commit()
+
+    def remove(self, email_ids: list[str]) -> None:
+        """Drop messages from the index"""
+        with self.lock:
+            for email_id in email_ids:
+                row = self.db.execute("SELECT rowid FROM docs WHERE id = ?", (email_id,)).fetchone()
+                if row is not None:
+                    self.db.execute("DELETE FROM emails WHERE rowid = ?", (row[0],))
+                    self.db.execute("DELETE FROM docs WHERE rowid = ?", (row[0],))
+            self.db.commit()
+
+    def search(self, query: str, limit: int) -> list[dict[str, str]]:
+        """Return the best matching messages for an FTS5 query, best match first"""
+        sql = (
+            "SELECT docs.id, emails.subject, emails.sender, emails.date, "
+            "snippet(emails, 3, '', '', '...', 16) "
+            "FROM emails JOIN docs ON docs.rowid = emails.rowid "
+            "WHERE emails MATCH ? ORDER BY rank LIMIT ?"
+        )
+        with self.lock:
+            try:
+                rows = self.db.execute(sql, (query, limit)).fetchall()
+            except sqlite3.OperationalError:
+                # Not valid FTS5 syntax, search for the words as plain terms instead
+                terms = ' '.join('"' + term.replace('"', '""') + '"' for term in query.split())
+                rows = self.db.execute(sql, (terms, limit)).fetchall() if terms else []
+        return [
+            {'id': row[0], 'subject': row[1], 'from': row[2], 'date': row[3], 'snippet': row[4]}
+            for row in rows
+        ]
+
+# In-memory until main() configures the on-disk index
+search_index = SearchIndex()
+
+class TokenBucket:
+    """Token bucket rate limiter shared by asyncio tasks"""
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """Wait until the requested number of tokens is available and take them"""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+class QuotaBudget:
+    """Client-side budget of Gmail quota units shared by all worker threads.
+
+    Requests spend their quota cost up front and sleep while the budget is
+    overdrawn, so bursts are slowed down locally before Google starts
+    rejecting them.
+    """
+    def __init__(self, units_per_second: float = QUOTA_UNITS_PER_SECOND):
+        self.rate = units_per_second
+        self.units = units_per_second
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def spend(self, units: int) -> float:
+        """Take units from the budget, waiting until they are covered. Returns the seconds waited"""
+        with self.lock:
+            now = time.monotonic()
+            self.units = min(self.rate, self.units + (now - self.updated) * self.rate)
+            self.updated = now
+            self.units -= units
+            wait = -self.units / self.rate if self.units < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+quota_budget = QuotaBudget()
+request_stats = {"requests": 0, "retries": 0, "throttled": 0, "throttle_seconds": 0.0, "failures": 0}
+request_stats_lock = threading.Lock()
+
+class SendQueue:
+    """Outgoing mail queue dispatched by a pool of workers under a send rate limit.
+
+    Jobs are tracked by id as queued, sent or failed. The queue is bounded, so
+    callers wait for room instead of piling up unlimited pending sends, and
+    only the max_finished most recent sent or failed jobs are remembered.
+    """
+    def __init__(self, workers: int = 4, per_second: float = SEND_RATE, max_pending: int = 1000,
+                 max_finished: int = 10000):
+        self.workers = workers
+        self.per_second = per_second
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.jobs = {}  # queued jobs
+        self.finished = OrderedDict()  # sent or failed jobs, oldest first
+        self.counts = {"queued": 0, "sent": 0, "failed": 0}
+        self.done = {}
+        # Created on first use so they bind to the server's event loop
+        self.queue = None
+        self.bucket = None
+        self.tasks = []
+
+    async def submit(self, recipient_id: str, subject: str, message: str) -> str:
+        """Queue an email and return its job id"""
+        if self.queue is None:
+            self.queue = asyncio.Queue(maxsize=self.max_pending)
+            self.bucket = TokenBucket(self.per_second, max(1.0, self.per_second))
+            self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = {"status": "queued", "recipient": recipient_id}
+        self.counts["queued"] += 1
+        self.done[job_id] = asyncio.get_running_loop().create_future()
+        await self.queue.put((job_id, recipient_id, subject, message))
+        return job_id
+
+    async def result(self, job_id: str) -> dict[str, str]:
+        """Wait for a job to be sent or to fail"""
+        # The future carries the job, it may be pruned from finished before this resumes
+        return await self.done[job_id]
+
+    def status(self, job_ids: list[str]) -> dict[str, Any]:
+        """Return the status of the given jobs, or all remembered ones, with totals per status since startup"""
+        job_ids = job_ids or [*self.jobs, *self.finished]
+        return {
+            "jobs": {
+                job_id: self.jobs.get(job_id) or self.finished.get(job_id, {"status": "unknown"})
+                for job_id in job_ids
+            },
+            "counts": dict(self.counts),
+        }
+
+    def _finish(self, job_id: str, **fields) -> None:
+        """Move a job to finished, forgetting the oldest finished jobs past max_finished"""
+        job = self.jobs.pop(job_id)
+        job.update(fields)
+        self.counts["queued"] -= 1
+        self.counts[job["status"]] += 1
+        self.finished[job_id] = job
+        while len(self.finished) > self.max_finished:
+            self.finished.popitem(last=False)
+        self.done.pop(job_id).set_result(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, recipient_id, subject, message = await self.queue.get()
+            try:
+                await self.bucket.acquire()
+                sent = await asyncio.to_thread(
+                    lambda: execute(gmail_service.service.users().messages().send(
+                        userId="me", body={'raw': build_raw_message(recipient_id, subject, message)}
+                    ))
+                )
+                self._finish(job_id, status="sent", message_id=sent['id'])
+                logger.info(f"Message sent: {sent['id']}")
+            except Exception as error:
+                # Keep the worker alive whatever went wrong with this message
+                self._finish(job_id, status="failed", error_message=str(error))
+            finally:
+                self.queue.task_done()
+
+send_queue = SendQueue()
+discovery_document = None
 
 class GmailService:
-    def __init__(self, service):
-        self.service = service
-        self.user_email = self._get_user_email()
+    def __init__(self, credentials, root_url: str | None = None):
+        self.credentials = credentials
+        # Send API calls somewhere other than Google, e.g. a fake backend for benchmarks
+        self.root_url = root_url
+        self.local = threading.local()
+        self._user_email = None
+        # Incremental sync state, see sync_mailbox()
+        self.history_id = None
+        self.unread_messages = OrderedDict()
+        self.sync_lock = threading.Lock()
+        # Background credential refresh started by main(), held here so the task is not garbage collected
+        self.refresh_task = None
+
+    @property
+    def service(self):
+        """Gmail API client owned by the calling thread.
+
+        httplib2 connections are not thread-safe, so each worker thread builds
+        its own client on first use and keeps reusing its keep-alive
+        connections afterwards.
+        """
+        service = getattr(self.local, 'service', None)
+        if service is None:
+            http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+            document = get_discovery_document()
+            if document is not None:
+                if self.root_url:
+                    document = dict(document, rootUrl=self.root_url)
+                service = build_from_document(document, http=http)
+            else:
+                client_options = {'api_endpoint': self.root_url} if self.root_url else None
+                service = build('gmail', 'v1', http=http, cache_discovery=False, client_options=client_options)
+            self.local.service = service
+        return service
+
+    @property
+    def user_email(self) -> str:
+        """User email address, looked up on first use to keep it off the startup path"""
+        if self._user_email is None:
+            self._user_email = self._get_user_email()
+        return self._user_email
 
     def _get_user_email(self) -> str:
         """Get user email address"""
-        profile = self.service.users().getProfile(userId='me').execute()
+        profile = execute(self.service.users().getProfile(userId='me'))
         return profile.get('emailAddress', '')
 
 @mcp.tool()
 async def send_email(recipient_id: str, subject: str, message: str) -> dict:
     """Creates and sends an email message"""
-    try:
-        message_obj = EmailMessage()
-        message_obj.set_content(message)
-        
-        message_obj['To'] = recipient_id
-        message_obj['From'] = gmail_service.user_email
-        message_obj['Subject'] = subject
+    job_id = await send_queue.submit(recipient_id, subject, message)
+    job = await send_queue.result(job_id)
+    if job["status"] == "failed":
+        return {"status": "error", "error_message": job["error_message"]}
+    return {"status": "success", "message_id": job["message_id"]}
 
-        encoded_message = base64.urlsafe_b64encode(message_obj.as_bytes()).decode()
-        create_message = {'raw': encoded_message}
-        
-        send_message = await asyncio.to_thread(
-            lambda: gmail_service.service.users().messages().send(userId="me", body=create_message).execute()
-        )
-        logger.info(f"Message sent: {send_message['id']}")
-        return {"status": "success", "message_id": send_message["id"]}
-    except HttpError as error:
-        return {"status": "error", "error_message": str(error)}
+@mcp.tool()
+async def send_emails(recipient_ids: list[str], subject: str, message: str) -> dict[str, str]:
+    """Queues the same email for several recipients and returns a job id per recipient without waiting for delivery"""
+    job_ids = {}
+    for recipient_id in recipient_ids:
+        job_ids[recipient_id] = await send_queue.submit(recipient_id, subject, message)
+    logger.info(f"Queued {len(job_ids)} messages")
+    return job_ids
+
+@mcp.tool()
+async def get_send_status(job_ids: list[str] = []) -> dict[str, Any]:
+    """Returns queued/sent/failed status of queued emails given their job IDs (all recent jobs if empty), unknown for forgotten ones"""
+    return send_queue.status(job_ids)
 
 @mcp.tool()
-async def get_unread_emails() -> list[dict[str, str]] | str:
-    """Retrieves unread messages from mailbox"""
+async def get_unread_emails(
+    max_results: int = DEFAULT_UNREAD_RESULTS, page_size: int = 100, page_token: str = '', paginate: bool = False
+) -> list[dict[str, str]] | dict[str, Any] | str:
+    """Retrieves unread messages from mailbox, the first 100 by default. max_results caps the number of messages returned, pass 0 explicitly to list all of them. With paginate, returns a single page and a next_page_token to continue from"""
     try:
-        user_id = 'me'
-        query = 'in:inbox is:unread category:primary'
+        # Fast path: once the mailbox has been synced, only fetch the changes since then
+        if not paginate and not page_token and (gmail_service.history_id is not None or not max_results):
+            _, unread = await asyncio.to_thread(sync_mailbox, max_results or None)
+            return [{'id': message_id, 'threadId': thread_id} for message_id, thread_id in unread]
 
-        response = await asyncio.to_thread(
-            lambda: gmail_service.service.users().messages().list(userId=user_id, q=query).execute()
-        )
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
         messages = []
-        if 'messages' in response:
-            messages.extend(response['messages'])
-
-        while 'nextPageToken' in response:
-            page_token = response['nextPageToken']
+        while True:
+            limit = page_size
+            if max_results:
+                limit = min(page_size, max_results - len(messages))
             response = await asyncio.to_thread(
-                lambda: gmail_service.service.users().messages().list(
-                    userId=user_id, q=query, pageToken=page_token
-                ).execute()
+                list_messages_page, UNREAD_QUERY, limit, page_token
             )
-            messages.extend(response['messages'])
+            messages.extend(response.get('messages', []))
+            page_token = response.get('nextPageToken', '')
+
+            if paginate:
+                return {"messages": messages, "next_page_token": page_token}
+            if not page_token or (max_results and len(messages) >= max_results):
+                break
         return messages
     except HttpError as error:
         return f"An HttpError occurred: {str(error)}"
 
+@mcp.tool()
+async def sync_changes() -> dict[str, Any] | str:
+    """Returns ids of unread inbox messages added, removed or relabeled since the last sync"""
+    try:
+        changes, _ = await asyncio.to_thread(sync_mailbox)
+        return changes
+    except HttpError as error:
+        return f"An HttpError occurred: {str(error)}"
+
 @mcp.tool()
 async def read_email(email_id: str) -> dict[str, str] | str:
     """Retrieves email contents including to, from, subject, and contents"""
     try:
+        cached = await asyncio.to_thread(message_cache.get, email_id)
+        if cached is not None:
+            logger.info(f"Email read from cache: {email_id}")
+            return cached
+
         msg = await asyncio.to_thread(
-            lambda: gmail_service.service.users().messages().get(
+            lambda: execute(gmail_service.service.users().messages().get(
                 userId="me", id=email_id, format='raw'
-            ).execute()
+            ))
         )
-        email_metadata = {}
-
-        # Decode the base64URL encoded raw content
-        raw_data = msg['raw']
-        decoded_data = urlsafe_b64decode(raw_data)
-
-        # Parse the RFC 2822 email
-        mime_message = message_from_bytes(decoded_data)
-
-        # Extract the email body
-        body = None
-        if mime_message.is_multipart():
-            for part in mime_message.walk():
-                if part.get_content_type() == "text/plain":
-                    body = part.get_payload(decode=True).decode()
-                    break
-        else:
-            body = mime_message.get_payload(decode=True).decode()
-        email_metadata['content'] = body
-        
-        # Extract metadata
-        email_metadata['subject'] = decode_mime_header(mime_message.get('subject', ''))
-        email_metadata['from'] = mime_message.get('from','')
-        email_metadata['to'] = mime_message.get('to','')
-        email_metadata['date'] = mime_message.get('date','')
+        email_metadata = parse_raw_message(msg['raw'])
+        await asyncio.to_thread(store_messages, [(email_id, int(msg.get('historyId', 0)), email_metadata)])
         
         logger.info(f"Email read: {email_id}")
         
@@ -139,15 +586,87 @@ async def read_email(email_id: str) -> dict[str, str] | str:
     except HttpError as error:
         return f"An HttpError occurred: {str(error)}"
 
+@mcp.tool()
+async def read_emails(email_ids: list[str]) -> dict[str, dict[str, str] | str] | str:
+    """Retrieves contents of several emails at once and marks them as read"""
+    try:
+        # Drop duplicates, batch request ids must be unique
+        email_ids = list(dict.fromkeys(email_ids))
+        results = await asyncio.to_thread(message_cache.get_many, email_ids)
+        missing_ids = [i for i in email_ids if i not in results]
+        responses = await asyncio.to_thread(batch_get_messages, missing_ids, 'raw')
+
+        fetched_ids = [i for i in missing_ids if not isinstance(responses[i], HttpError)]
+        parsed = await asyncio.gather(*(
+            asyncio.to_thread(parse_raw_message, responses[i]['raw']) for i in fetched_ids
+        ))
+
+        for email_id in missing_ids:
+            if isinstance(responses[email_id], HttpError):
+                results[email_id] = f"An HttpError occurred: {str(responses[email_id])}"
+        await asyncio.to_thread(store_messages, [
+            (email_id, int(responses[email_id].get('historyId', 0)), email_metadata)
+            for email_id, email_metadata in zip(fetched_ids, parsed)
+        ])
+        results.update(zip(fetched_ids, parsed))
+        logger.info(f"Emails read: {len(fetched_ids)} fetched, {len(email_ids) - len(missing_ids)} cached")
+
+        # Mark everything we fetched as read in bulk
+        await asyncio.to_thread(batch_modify_labels, fetched_ids, {'removeLabelIds': ['UNREAD']})
+
+        return {email_id: results[email_id] for email_id in email_ids}
+    except HttpError as error:
+        return f"An HttpError occurred: {str(error)}"
+
+@mcp.tool()
+async def read_email_headers(email_id: str, headers: list[str] = DEFAULT_HEADERS) -> dict[str, str] | str:
+    """Retrieves only the headers of an email (subject, from, to, date by default) without downloading the body"""
+    try:
+        msg = await asyncio.to_thread(
+            lambda: execute(gmail_service.service.users().messages().get(
+                userId="me", id=email_id, format='metadata', metadataHeaders=headers,
+                fields=METADATA_FIELDS,
+            ))
+        )
+        logger.info(f"Email headers read: {email_id}")
+        return parse_metadata_headers(msg, headers)
+    except HttpError as error:
+        return f"An HttpError occurred: {str(error)}"
+
+@mcp.tool()
+async def search_local_emails(query: str, limit: int = 10, remote_fallback: bool = True) -> dict[str, Any] | str:
+    """Searches subject, sender and body of already fetched emails locally. Falls back to a Gmail search when nothing matches locally"""
+    try:
+        messages = await asyncio.to_thread(search_index.search, query, limit)
+        if messages or not remote_fallback:
+            return {"source": "local", "messages": messages}
+
+        response = await asyncio.to_thread(list_messages_page, query, max(1, min(limit, MAX_PAGE_SIZE)))
+        return {"source": "remote", "messages": response.get('messages', [])}
+    except HttpError as error:
+        return f"An HttpError occurred: {str(error)}"
+
+@mcp.tool()
+async def get_request_stats() -> dict[str, Any]:
+    """Returns request, retry and client-side throttling counters for Gmail API calls"""
+    with request_stats_lock:
+        return dict(request_stats)
+
+@mcp.tool()
+async def get_cache_stats() -> dict[str, Any]:
+    """Returns hit/miss counters and sizes of the email content cache"""
+    return await asyncio.to_thread(message_cache.stats)
+
 @mcp.tool()
 async def trash_email(email_id: str) -> str:
     """Moves email to trash given ID"""
     try:
         await asyncio.to_thread(
-            lambda: gmail_service.service.users().messages().trash(
+            lambda: execute(gmail_service.service.users().messages().trash(
                 userId="me", id=email_id
-            ).execute()
+            ))
         )
+        await asyncio.to_thread(forget_messages, [email_id])
         logger.info(f"Email moved to trash: {email_id}")
         return "Email moved to trash successfully."
     except HttpError as error:
@@ -158,15 +677,70 @@ async def mark_email_as_read(email_id: str) -> str:
     """Marks email as read given ID"""
     try:
         await asyncio.to_thread(
-            lambda: gmail_service.service.users().messages().modify(
+            lambda: execute(gmail_service.service.users().messages().modify(
                 userId="me", id=email_id, body={'removeLabelIds': ['UNREAD']}
-            ).execute()
+            ))
         )
         logger.info(f"Email marked as read: {email_id}")
         return "Email marked as read."
     except HttpError as error:
         return f"An HttpError occurred: {str(error)}"
 
+@mcp.tool()
+async def trash_emails(email_ids: list[str], permanent: bool = False) -> dict[str, str] | str:
+    """Moves several emails to trash given their IDs, or deletes them permanently if permanent is set and allowed by the granted scope"""
+    try:
+        email_ids = list(dict.fromkeys(email_ids))
+        if permanent:
+            if not gmail_service.credentials.has_scopes([FULL_ACCESS_SCOPE]):
+                return f"Permanent deletion requires the {FULL_ACCESS_SCOPE} scope, start the server with --full-access."
+            outcomes = {}
+            for start in range(0, len(email_ids), BATCH_MODIFY_SIZE):
+                chunk = email_ids[start:start + BATCH_MODIFY_SIZE]
+                # batchDelete succeeds or fails as a whole, a failing chunk keeps the others' outcomes
+                try:
+                    await asyncio.to_thread(
+                        lambda: execute(gmail_service.service.users().messages().batchDelete(
+                            userId="me", body={'ids': chunk}
+                        ))
+                    )
+                    outcomes.update(dict.fromkeys(chunk))
+                except HttpError as error:
+                    outcomes.update(dict.fromkeys(chunk, error))
+        else:
+            # Requests are built on the worker thread so they use that thread's client
+            responses = await asyncio.to_thread(lambda: batch_execute({
+                email_id: gmail_service.service.users().messages().trash(userId="me", id=email_id)
+                for email_id in email_ids
+            }))
+            outcomes = {
+                email_id: response if isinstance(response, HttpError) else None
+                for email_id, response in responses.items()
+            }
+
+        await asyncio.to_thread(forget_messages, [i for i in email_ids if outcomes[i] is None])
+        logger.info(f"Emails moved to trash: {sum(e is None for e in outcomes.values())} of {len(email_ids)}")
+        return {
+            email_id: "success" if outcomes[email_id] is None else f"An HttpError occurred: {str(outcomes[email_id])}"
+            for email_id in email_ids
+        }
+    except HttpError as error:
+        return f"An HttpError occurred: {str(error)}"
+
+@mcp.tool()
+async def mark_emails_as_read(email_ids: list[str]) -> dict[str, str] | str:
+    """Marks several emails as read given their IDs"""
+    try:
+        email_ids = list(dict.fromkeys(email_ids))
+        outcomes = await asyncio.to_thread(batch_modify_labels, email_ids, {'removeLabelIds': ['UNREAD']})
+        logger.info(f"Emails marked as read: {sum(e is None for e in outcomes.values())} of {len(email_ids)}")
+        return {
+            email_id: "success" if outcomes[email_id] is None else f"An HttpError occurred: {str(outcomes[email_id])}"
+            for email_id in email_ids
+        }
+    except HttpError as error:
+        return f"An HttpError occurred: {str(error)}"
+
 @mcp.tool()
 async def open_email(email_id: str) -> str:
     """Opens email in browser given ID"""
@@ -177,6 +751,286 @@ async def open_email(email_id: str) -> str:
     except HttpError as error:
         return f"An HttpError occurred: {str(error)}"
 
+def get_discovery_document() -> dict[str, Any] | None:
+    """Helper function returning the Gmail discovery document shipped with googleapiclient.
+
+    Parsed once and shared by every thread's client, so building a client
+    never fetches or re-parses discovery data.
+    """
+    global discovery_document
+    if discovery_document is None:
+        document = get_static_doc('gmail', 'v1')
+        if document is not None:
+            discovery_document = json.loads(document)
+    return discovery_document
+
+def build_raw_message(recipient_id: str, subject: str, message: str) -> str:
+    """Helper function to build a base64url encoded email ready for messages.send"""
+    message_obj = EmailMessage()
+    message_obj.set_content(message)
+
+    message_obj['To'] = recipient_id
+    message_obj['From'] = gmail_service.user_email
+    message_obj['Subject'] = subject
+
+    return base64.urlsafe_b64encode(message_obj.as_bytes()).decode()
+
+def parse_raw_message(raw_data: str) -> dict[str, str]:
+    """Helper function to extract body and headers from a base64url encoded RFC 2822 message"""
+    # Decode the base64URL encoded raw content
+    decoded_data = urlsafe_b64decode(raw_data)
+
+    # Parse the RFC 2822 email
+    mime_message = message_from_bytes(decoded_data)
+    email_metadata = {}
+
+    # Extract the email body
+    body = None
+    if mime_message.is_multipart():
+        for part in mime_message.walk():
+            if part.get_content_type() == "text/plain":
+                body = part.get_payload(decode=True).decode()
+                break
+    else:
+        body = mime_message.get_payload(decode=True).decode()
+    email_metadata['content'] = body
+
+    # Extract metadata
+    email_metadata['subject'] = decode_mime_header(mime_message.get('subject', ''))
+    email_metadata['from'] = mime_message.get('from','')
+    email_metadata['to'] = mime_message.get('to','')
+    email_metadata['date'] = mime_message.get('date','')
+    return email_metadata
+
+def list_messages_page(query: str, page_size: int, page_token: str = '') -> dict[str, Any]:
+    """Helper function to fetch one page of message ids matching a query"""
+    kwargs = {'pageToken': page_token} if page_token else {}
+    return execute(gmail_service.service.users().messages().list(
+        userId="me", q=query, maxResults=page_size, fields=LIST_FIELDS, **kwargs
+    ))
+
+def sync_mailbox(limit: int | None = None) -> tuple[dict[str, Any], list[tuple[str, str]]]:
+    """Helper function to bring the tracked unread inbox up to date.
+
+    Uses users.history.list from the last seen historyId, and falls back to a
+    full listing on the first call or once that historyId has expired.
+    Returns the changes and a snapshot of the first limit (default all)
+    unread (id, threadId) pairs, copied under the lock since later syncs
+    update them in place.
+    """
+    with gmail_service.sync_lock:
+        changes = None
+        if gmail_service.history_id is not None:
+            try:
+                changes = _apply_history()
+            except HttpError as error:
+                if error.resp.status != 404:
+                    raise
+                logger.info("History id expired, running a full resync")
+        if changes is None:
+            changes = _full_resync()
+        return changes, list(itertools.islice(gmail_service.unread_messages.items(), limit))
+
+def _full_resync() -> dict[str, Any]:
+    # Take the history id before listing so nothing that happens meanwhile is missed
+    profile = execute(gmail_service.service.users().getProfile(userId='me', fields='historyId'))
+    unread_messages = OrderedDict()
+    page_token = ''
+    while True:
+        response = list_messages_page(UNREAD_QUERY, MAX_PAGE_SIZE, page_token)
+        for message in response.get('messages', []):
+            unread_messages[message['id']] = message['threadId']
+        page_token = response.get('nextPageToken', '')
+        if not page_token:
+            break
+
+    removed = [i for i in gmail_service.unread_messages if i not in unread_messages]
+    gmail_service.unread_messages = unread_messages
+    gmail_service.history_id = profile['historyId']
+    logger.info(f"Full mailbox sync: {len(unread_messages)} unread messages")
+    return {
+        "full_resync": True,
+        "history_id": gmail_service.history_id,
+        "added": list(unread_messages),
+        "removed": removed,
+        "relabeled": [],
+    }
+
+def _apply_history() -> dict[str, Any]:
+    unread = gmail_service.unread_messages
+    added, removed, relabeled = {}, {}, {}
+    page_token = ''
+    while True:
+        kwargs = {'pageToken': page_token} if page_token else {}
+        response = execute(gmail_service.service.users().history().list(
+            userId="me", startHistoryId=gmail_service.history_id, **kwargs
+        ))
+        for record in response.get('history', []):
+            for change in record.get('messagesDeleted', []):
+                message = change['message']
+                removed[message['id']] = True
+                unread.pop(message['id'], None)
+            for key, seen in (('messagesAdded', added), ('labelsAdded', relabeled), ('labelsRemoved', relabeled)):
+                for change in record.get(key, []):
+                    message = change['message']
+                    seen[message['id']] = True
+                    if UNREAD_LABELS.issubset(message.get('labelIds', [])):
+                        if message['id'] not in unread:
+                            unread[message['id']] = message['threadId']
+                            unread.move_to_end(message['id'], last=False)
+                    else:
+                        unread.pop(message['id'], None)
+        page_token = response.get('nextPageToken', '')
+        if not page_token:
+            break
+
+    gmail_service.history_id = response.get('historyId', gmail_service.history_id)
+    forget_messages(list(removed))
+    return {
+        "full_resync": False,
+        "history_id": gmail_service.history_id,
+        "added": list(added),
+        "removed": list(removed),
+        "relabeled": [i for i in relabeled if i not in added],
+    }
+
+def parse_metadata_headers(msg: dict[str, Any], headers: list[str]) -> dict[str, str]:
+    """Helper function to map the headers of a format='metadata' message to lower-case keys"""
+    wanted = {name.lower() for name in headers}
+    email_metadata = {name.lower(): '' for name in headers}
+    for header in msg.get('payload', {}).get('headers', []):
+        name = header['name'].lower()
+        if name in wanted:
+            email_metadata[name] = decode_mime_header(header['value'])
+    return email_metadata
+
+def execute(request: Any, quota_units: int | None = None) -> Any:
+    """Helper function to execute a Gmail API request with quota throttling and retries.
+
+    Every .execute() goes through here. 429, 5xx and rate limit 403 responses
+    are retried with exponential backoff and full jitter, waiting at least as
+    long as any Retry-After header asks.
+    """
+    if quota_units is None:
+        quota_units = QUOTA_UNITS.get(getattr(request, 'methodId', None), DEFAULT_QUOTA_UNITS)
+    for attempt in range(MAX_RETRIES + 1):
+        spend_quota(quota_units)
+        try:
+            return request.execute()
+        except HttpError as error:
+            delay = retry_delay(error, attempt)
+            if delay is None:
+                with request_stats_lock:
+                    request_stats["failures"] += 1
+                raise
+            logger.info(f"Retrying Gmail request in {delay:.2f}s after HTTP {error.resp.status}")
+            with request_stats_lock:
+                request_stats["retries"] += 1
+            time.sleep(delay)
+
+def spend_quota(units: int) -> None:
+    """Helper function to take units from the quota budget and record the request"""
+    waited = quota_budget.spend(units)
+    with request_stats_lock:
+        request_stats["requests"] += 1
+        if waited:
+            request_stats["throttled"] += 1
+            request_stats["throttle_seconds"] += waited
+
+def retry_delay(error: HttpError, attempt: int) -> float | None:
+    """Helper function returning how long to wait before retrying, or None if the error is final"""
+    if attempt >= MAX_RETRIES:
+        return None
+    status = error.resp.status
+    rate_limited = status == 403 and b'ateLimitExceeded' in (error.content or b'')
+    if status not in RETRY_STATUSES and not rate_limited:
+        return None
+    delay = random.uniform(0, min(MAX_BACKOFF, BACKOFF_BASE * 2 ** attempt))
+    retry_after = error.resp.get('retry-after', '')
+    if retry_after.isdigit():
+        delay = max(delay, float(retry_after))
+    return delay
+
+def batch_execute(requests: dict[str, Any]) -> dict[str, Any]:
+    """Helper function to run API requests keyed by id through Gmail batch HTTP requests.
+
+    Returns a mapping of id to the API response, or to the HttpError raised
+    for that request, so one bad id does not fail the others. Requests that
+    fail with a retryable error are resent in a later batch.
+    """
+    responses = {}
+
+    def callback(request_id, response, exception):
+        responses[request_id] = exception if exception is not None else response
+
+    pending = list(requests)
+    for attempt in range(MAX_RETRIES + 1):
+        for start in range(0, len(pending), BATCH_REQUEST_SIZE):
+            chunk = pending[start:start + BATCH_REQUEST_SIZE]
+            batch = gmail_service.service.new_batch_http_request(callback=callback)
+            for request_id in chunk:
+                batch.add(requests[request_id], request_id=request_id)
+            units = sum(
+                QUOTA_UNITS.get(getattr(requests[i], 'methodId', None), DEFAULT_QUOTA_UNITS) for i in chunk
+            )
+            execute(batch, quota_units=units)
+
+        delays = {}
+        for request_id in pending:
+            if isinstance(responses[request_id], HttpError):
+                delay = retry_delay(responses[request_id], attempt)
+                if delay is not None:
+                    delays[request_id] = delay
+        pending = list(delays)
+        if not pending:
+            break
+        with request_stats_lock:
+            request_stats["retries"] += len(pending)
+        time.sleep(max(delays.values()))
+    return responses
+
+def store_messages(messages: list[tuple[str, int, dict[str, str]]]) -> None:
+    """Helper function to cache and index fetched (id, history id, parsed message) tuples"""
+    message_cache.put_many(messages)
+    search_index.add_many([(email_id, message) for email_id, _, message in messages])
+
+def forget_messages(email_ids: list[str]) -> None:
+    """Helper function to drop trashed or deleted messages from the cache and the index"""
+    message_cache.invalidate(email_ids)
+    search_index.remove(email_ids)
+
+def batch_get_messages(email_ids: list[str], format: str, **kwargs) -> dict[str, Any]:
+    """Helper function to fetch many messages with Gmail batch HTTP requests"""
+    messages = gmail_service.service.users().messages()
+    return batch_execute({
+        email_id: messages.get(userId="me", id=email_id, format=format, **kwargs)
+        for email_id in email_ids
+    })
+
+def batch_modify_labels(email_ids: list[str], body: dict[str, list[str]]) -> dict[str, HttpError | None]:
+    """Helper function to change labels of many messages with messages.batchModify.
+
+    batchModify succeeds or fails as a whole, so a failing chunk is retried
+    one id at a time to find out which ids are at fault. Returns a mapping of
+    id to None on success or to the HttpError for that id.
+    """
+    messages = gmail_service.service.users().messages()
+    outcomes = {}
+    for start in range(0, len(email_ids), BATCH_MODIFY_SIZE):
+        chunk = email_ids[start:start + BATCH_MODIFY_SIZE]
+        try:
+            execute(messages.batchModify(userId="me", body={'ids': chunk, **body}))
+            outcomes.update(dict.fromkeys(chunk))
+        except HttpError:
+            responses = batch_execute({
+                email_id: messages.modify(userId="me", id=email_id, body=body)
+                for email_id in chunk
+            })
+            for email_id in chunk:
+                error = responses[email_id]
+                outcomes[email_id] = error if isinstance(error, HttpError) else None
+    return outcomes
+
 def decode_mime_header(header: str) -> str:
     """Helper function to decode encoded email headers"""
     decoded_parts = decode_header(header)
@@ -188,11 +1042,42 @@ def decode_mime_header(header: str) -> str:
             decoded_string += part
     return decoded_string
 
+def save_credentials(creds: Credentials, token_path: str) -> None:
+    """Save the credentials for the next run"""
+    print(f"Saving credentials to {token_path}")
+    with open(token_path, 'w') as token:
+        token.write(creds.to_json())
+    print("Credentials saved successfully")
+
+def refresh_credentials(creds: Credentials, token_path: str) -> None:
+    """Refresh expired credentials and save them.
+
+    Runs while the stdio server is up, so it logs to stderr instead of printing.
+    """
+    try:
+        creds.refresh(Request())
+        with open(token_path, 'w') as token:
+            token.write(creds.to_json())
+        logger.info("Credentials refreshed and saved")
+    except Exception as e:
+        logger.error(f"Background credential refresh failed: {str(e)}")
+
 async def main():
     parser = argparse.ArgumentParser(description='Gmail Server Test')
     parser.add_argument('--creds-file-path', required=True, help='Path to credentials.json')
     parser.add_argument('--token-path', required=True, help='Path to token.json')
+    parser.add_argument('--workers', type=int, default=8, help='Number of threads (and Gmail clients) serving API calls')
+    parser.add_argument('--send-workers', type=int, default=4, help='Number of concurrent send workers')
+    parser.add_argument('--send-rate', type=float, default=SEND_RATE, help='Maximum emails sent per second')
+    parser.add_argument('--quota-units-per-second', type=float, default=QUOTA_UNITS_PER_SECOND, help='Client-side Gmail quota budget')
+    parser.add_argument('--api-root-url', default=None, help='Root URL of the Gmail API, e.g. a local fake backend')
+    parser.add_argument('--cache-path', default='gmail_cache.sqlite3', help='Path to the on-disk email cache (empty to disable)')
+    parser.add_argument('--index-path', default='gmail_index.sqlite3', help='Path to the local full-text search index (empty to keep it in memory)')
+    parser.add_argument('--cache-memory-mb', type=int, default=32, help='Size of the in-memory email cache in MB')
+    parser.add_argument('--cache-disk-mb', type=int, default=256, help='Size of the on-disk email cache in MB')
+    parser.add_argument('--full-access', action='store_true', help='Also request the full mail scope, needed by trash_emails(permanent=True)')
     args = parser.parse_args()
+    scopes = SCOPES + [FULL_ACCESS_SCOPE] if args.full_access else SCOPES
 
     # Initialize Gmail service
     print("Starting Gmail service initialization...")
@@ -202,46 +1087,68 @@ async def main():
         if os.path.exists(args.token_path):
             try:
                 print(f"Loading credentials from {args.token_path}")
-                creds = Credentials.from_authorized_user_file(args.token_path, SCOPES)
+                if args.full_access:
+                    # Keep the scopes recorded in the token, one granted without full access needs a new consent
+                    creds = Credentials.from_authorized_user_file(args.token_path)
+                else:
+                    creds = Credentials.from_authorized_user_file(args.token_path, scopes)
                 print("Credentials loaded successfully")
+                if not creds.has_scopes(scopes):
+                    print("Token lacks the full access scope. Will create a new one.")
+                    creds = None
             except json.JSONDecodeError:
                 print("Token file exists but is invalid. Will create a new one.")
                 creds = None
         
+        # Bound the threads running Gmail calls, each one gets its own client
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix='gmail')
+        )
+
         # If there are no (valid) credentials available, let the user log in
+        refresh_task = None
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
-                print("Refreshing expired credentials...")
-                creds.refresh(Request())
-                print("Credentials refreshed successfully")
+                # Refresh in the background so the server starts right away,
+                # a request that gets there first refreshes on its own
+                print("Refreshing expired credentials in the background...")
+                refresh_task = asyncio.create_task(
+                    asyncio.to_thread(refresh_credentials, creds, args.token_path)
+                )
             else:
                 print("No valid credentials found. Starting OAuth flow...")
                 print("A browser window should open for authentication...")
-                flow = InstalledAppFlow.from_client_secrets_file(args.creds_file_path, SCOPES)
+                flow = InstalledAppFlow.from_client_secrets_file(args.creds_file_path, scopes)
                 creds = flow.run_local_server(port=0)
                 print("OAuth flow completed successfully")
-            
-            # Save the credentials for the next run
-            print(f"Saving credentials to {args.token_path}")
-            with open(args.token_path, 'w') as token:
-                token.write(creds.to_json())
-            print("Credentials saved successfully")
+                save_credentials(creds, args.token_path)
 
-        # Build the Gmail service
+        # Initialize global Gmail service
         print("Building Gmail service...")
-        service = build('gmail', 'v1', credentials=creds)
+        global gmail_service, message_cache, send_queue, search_index, quota_budget
+        gmail_service = GmailService(creds, root_url=args.api_root_url)
+        gmail_service.refresh_task = refresh_task
+        quota_budget = QuotaBudget(args.quota_units_per_second)
         print("Gmail service built successfully")
-        
-        # Initialize global Gmail service
-        global gmail_service
-        gmail_service = GmailService(service)
+        message_cache = MessageCache(
+            args.cache_path or None,
+            memory_bytes=args.cache_memory_mb * 2**20,
+            disk_bytes=args.cache_disk_mb * 2**20,
+        )
+        search_index = SearchIndex(args.index_path or ':memory:')
+        send_queue = SendQueue(workers=args.send_workers, per_second=args.send_rate)
         
         # Run the MCP server
         print("Starting MCP server...")
-        if len(sys.argv) > 1 and sys.argv[1] == "dev":
-            await mcp.run_async()  # Run without transport for dev server
-        else:
-            await mcp.run_stdio_async()  # Run with stdio for direct execution
+        try:
+            if len(sys.argv) > 1 and sys.argv[1] == "dev":
+                await mcp.run_async()  # Run without transport for dev server
+            else:
+                await mcp.run_stdio_async()  # Run with stdio for direct execution
+        finally:
+            # Let a refresh still running finish saving the token before the loop closes
+            if gmail_service.refresh_task is not None:
+                await gmail_service.refresh_task
             
     except Exception as e:
         print(f"An error occurred: {str(e)}")
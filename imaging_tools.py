@@ -0,0 +1,153 @@
+"""Imaging tools of the Calculator server: thumbnails of single images and whole folders.
+
+PIL is imported by the first thumbnail that has to be encoded, so loading
+this plugin, and serving thumbnails from the disk cache, costs no PIL import.
+"""
+import asyncio
+import functools
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from mcp.server.fastmcp import Context, FastMCP, Image
+
+from mcp_workers import get_process_pool, reset_process_pool, run_heavy
+
+# Encoded thumbnails are kept here, named after the source file's path, mtime and size
+THUMBNAIL_CACHE_DIR = os.getenv(
+    "THUMBNAIL_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "thumbnail_cache")
+)
+# Tool format name -> PIL format name
+THUMBNAIL_FORMATS = {"png": "PNG", "webp": "WEBP"}
+MAX_THUMBNAIL_SIZE = 2048
+
+
+def thumbnail_cache_path(image_path: str, size: int, format: str, cache_dir: str = THUMBNAIL_CACHE_DIR) -> str:
+    """Cache file of a thumbnail; a changed source file gets a new name"""
+    if format not in THUMBNAIL_FORMATS:
+        raise ValueError(f"Unknown format {format!r}, expected one of {', '.join(THUMBNAIL_FORMATS)}")
+    if not 1 <= size <= MAX_THUMBNAIL_SIZE:
+        raise ValueError(f"size must be between 1 and {MAX_THUMBNAIL_SIZE}")
+    image_path = os.path.abspath(image_path)
+    stat = os.stat(image_path)
+    key = hashlib.sha1(f"{image_path}\0{stat.st_mtime_ns}\0{stat.st_size}\0{size}".encode()).hexdigest()
+    return os.path.join(cache_dir, f"{key}.{format}")
+
+
+def make_thumbnail(image_path: str, size: int = 100, format: str = "png", cache_dir: str = THUMBNAIL_CACHE_DIR) -> str:
+    """Return the cached thumbnail of image_path, encoding it first if it is missing"""
+    path = thumbnail_cache_path(image_path, size, format, cache_dir)
+    if os.path.exists(path):
+        return path
+    from PIL import Image as PILImage, ImageOps
+
+    with PILImage.open(image_path) as img:
+        # JPEGs decode straight at 1/2, 1/4 or 1/8 scale, never below size
+        img.draft("RGB", (size, size))
+        img = ImageOps.exif_transpose(img)
+        # Convert before resizing, thumbnail() rejects modes such as 16-bit grayscale (I;16)
+        has_alpha = "A" in img.getbands() or "transparency" in img.info
+        if img.mode not in ("RGB", "RGBA", "L", "LA", "P") or (format == "webp" and img.mode != "RGB"):
+            img = img.convert("RGBA" if has_alpha else "RGB")
+        img.thumbnail((size, size))
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write then rename so concurrent callers never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            img.save(tmp_path, THUMBNAIL_FORMATS[format])
+            os.replace(tmp_path, path)
+        finally:
+            # Only left over when saving or renaming failed
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return path
+
+
+async def create_thumbnail(image_path: str, size: int = 100, format: str = "png") -> Image:
+    """Create a thumbnail of an image, at most size pixels on each side, encoded as png or webp"""
+    print("CALLED: create_thumbnail(image_path: str, size: int = 100, format: str = \"png\") -> Image:")
+    path = thumbnail_cache_path(image_path, size, format)
+    if not os.path.exists(path):
+        path = await run_heavy(functools.partial(make_thumbnail, image_path, size, format))
+    with open(path, "rb") as f:
+        return Image(data=f.read(), format=format)
+
+
+async def create_thumbnails(directory: str, pattern: str = "*.jpg", size: int = 100, format: str = "png",
+                            ctx: Context = None) -> dict:
+    """Create thumbnails of every image in directory matching pattern (** recurses) in one call, in parallel. Images whose thumbnail is up to date are skipped. Writes a manifest of source -> thumbnail paths and returns its path with counts"""
+    print("CALLED: create_thumbnails(directory: str, pattern: str = \"*.jpg\", size: int = 100, format: str = \"png\") -> dict:")
+    start = time.perf_counter()
+    directory = os.path.abspath(os.path.expanduser(directory))
+    if not os.path.isdir(directory):
+        raise ValueError(f"{directory} is not a directory")
+    paths = sorted(p for p in glob.glob(os.path.join(directory, pattern), recursive=True) if os.path.isfile(p))
+    manifest, errors, todo = {}, {}, []
+    for path in paths:
+        try:
+            cached = thumbnail_cache_path(path, size, format)
+        except OSError as e:
+            errors[path] = str(e)
+            continue
+        if os.path.exists(cached):
+            manifest[path] = cached
+        else:
+            todo.append(path)
+    skipped = len(manifest)
+
+    total = len(paths)
+    done = total - len(todo)
+    # Progress every 1% is plenty, one notification per image floods the client
+    report_every = max(1, total // 100)
+    if ctx is not None:
+        await ctx.report_progress(done, total)
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    pending = {loop.run_in_executor(pool, make_thumbnail, path, size, format): path for path in todo}
+    sources = dict(pending)
+    broken = False
+    try:
+        while pending:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in finished:
+                source = sources.pop(future)
+                try:
+                    manifest[source] = future.result()
+                except Exception as e:
+                    errors[source] = f"{type(e).__name__}: {e}"
+                    broken = broken or isinstance(e, BrokenProcessPool)
+                done += 1
+                if ctx is not None and (done % report_every == 0 or done == total):
+                    await ctx.report_progress(done, total)
+    except asyncio.CancelledError:
+        reset_process_pool(pool)
+        raise
+    if broken:
+        reset_process_pool(pool)
+
+    os.makedirs(THUMBNAIL_CACHE_DIR, exist_ok=True)
+    manifest_key = hashlib.sha1(f"{directory}\0{pattern}\0{size}\0{format}".encode()).hexdigest()
+    manifest_path = os.path.join(THUMBNAIL_CACHE_DIR, f"manifest-{manifest_key}.json")
+    with open(f"{manifest_path}.tmp", "w") as f:
+        json.dump({
+            "directory": directory, "pattern": pattern, "size": size, "format": format,
+            "thumbnails": dict(sorted(manifest.items())), "errors": errors,
+        }, f, indent=1)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+    return {
+        "manifest": manifest_path,
+        "images": total,
+        "created": len(manifest) - skipped,
+        "skipped": skipped,
+        "failed": len(errors),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def register(mcp: FastMCP) -> None:
+    """Add the imaging tools to mcp"""
+    mcp.tool()(create_thumbnail)
+    mcp.tool()(create_thumbnails)
@@ -0,0 +1,340 @@
+"""Keynote automation tools of the Calculator server, macOS only.
+
+They drive Keynote through AppleScript, so the server registers them only
+when running on macOS. Scripts are not run one osascript process each:
+the tools queue them on a backend that keeps one scripting process alive
+and sends whatever is queued as a single batch. The process acknowledges
+a batch once every script in it has finished, so no tool has to sleep
+and hope Keynote kept up.
+
+OsascriptBackend talks to Keynote. RecordingBackend speaks the same
+protocol to a small Python process that only records the scripts, which
+lets benchmarks/bench_keynote.py measure the batching on any platform.
+"""
+import asyncio
+import json
+import os
+import sys
+
+from mcp.server.fastmcp import FastMCP
+from mcp.types import TextContent
+
+# Most scripts sent to the scripting process in one batch
+MAX_BATCH_SIZE = 32
+# Seconds to wait for a batch to be acknowledged before restarting the process
+BATCH_TIMEOUT = 30.0
+
+# JXA loop run by the long-lived osascript: reads one JSON batch per line,
+# runs each AppleScript with NSAppleScript and answers with one JSON line
+OSASCRIPT_SERVER = r'''
+ObjC.import("Foundation");
+function run() {
+    const input = $.NSFileHandle.fileHandleWithStandardInput;
+    const output = $.NSFileHandle.fileHandleWithStandardOutput;
+    let buffer = "";
+    for (;;) {
+        const data = input.availableData;
+        if (data.length === 0) return;
+        buffer += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+        let end;
+        while ((end = buffer.indexOf("\n")) >= 0) {
+            const batch = JSON.parse(buffer.slice(0, end));
+            buffer = buffer.slice(end + 1);
+            const results = batch.scripts.map(source => {
+                const error = Ref();
+                const result = $.NSAppleScript.alloc.initWithSource(source).executeAndReturnError(error);
+                if (result.isNil()) {
+                    const details = ObjC.deepUnwrap(error[0]) || {};
+                    return {ok: false, error: details.NSAppleScriptErrorMessage || "AppleScript error"};
+                }
+                return {ok: true, output: ObjC.unwrap(result.stringValue) || ""};
+            });
+            const line = JSON.stringify({id: batch.id, results: results}) + "\n";
+            output.writeData($.NSString.alloc.initWithString(line).dataUsingEncoding($.NSUTF8StringEncoding));
+        }
+    }
+}
+'''
+
+# Stand-in for OSASCRIPT_SERVER: acknowledges every script after argv[1] seconds,
+# and answers "true" to the Keynote running checks
+RECORDER_SERVER = r'''
+import json, sys, time
+delay = float(sys.argv[1])
+for line in sys.stdin:
+    batch = json.loads(line)
+    results = []
+    for script in batch["scripts"]:
+        time.sleep(delay)
+        results.append({"ok": True, "output": "true" if "is running" in script else ""})
+    sys.stdout.write(json.dumps({"id": batch["id"], "results": results}) + "\n")
+    sys.stdout.flush()
+'''
+
+
+class ScriptError(Exception):
+    """An AppleScript failed inside the scripting process"""
+
+
+class ScriptBackend:
+    """Queue of scripts sent in batches to one long-lived scripting process"""
+
+    def __init__(self, command: list[str], max_batch_size: int = MAX_BATCH_SIZE):
+        self.command = command
+        self.max_batch_size = max_batch_size
+        self.queue = None
+        self.worker = None
+        self.process = None
+        self.batch_id = 0
+        self.stats = {"scripts": 0, "batches": 0, "processes": 0}
+
+    async def run(self, script: str) -> str:
+        """Queue script, return its output once the scripting process acknowledged it"""
+        if self.worker is None or self.worker.done():
+            self.queue = asyncio.Queue()
+            self.worker = asyncio.get_running_loop().create_task(self.send_batches())
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((script, future))
+        return await future
+
+    async def send_batches(self) -> None:
+        """Send queued scripts, as many per batch as are waiting, until cancelled"""
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                results = await self.execute([script for script, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if result["ok"]:
+                    future.set_result(result["output"])
+                else:
+                    future.set_exception(ScriptError(result["error"]))
+
+    async def execute(self, scripts: list[str]) -> list[dict]:
+        """Send one batch and wait for its acknowledgement"""
+        if self.process is None or self.process.returncode is not None:
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            )
+            self.stats["processes"] += 1
+        self.batch_id += 1
+        self.stats["scripts"] += len(scripts)
+        self.stats["batches"] += 1
+        self.process.stdin.write((json.dumps({"id": self.batch_id, "scripts": scripts}) + "\n").encode())
+        try:
+            await self.process.stdin.drain()
+            line = await asyncio.wait_for(self.process.stdout.readline(), BATCH_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError):
+            self.close()
+            raise ScriptError(f"Scripting process did not acknowledge within {BATCH_TIMEOUT} seconds")
+        if not line:
+            self.close()
+            raise ScriptError("Scripting process exited")
+        ack = json.loads(line)
+        if ack["id"] != self.batch_id:
+            self.close()
+            raise ScriptError(f"Acknowledgement for batch {ack['id']} while waiting for {self.batch_id}")
+        return ack["results"]
+
+    def close(self) -> None:
+        """Stop the scripting process, the next batch starts a new one"""
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+        self.process = None
+
+
+class OsascriptBackend(ScriptBackend):
+    """Runs the scripts in Keynote through one osascript process"""
+
+    def __init__(self, max_batch_size: int = MAX_BATCH_SIZE):
+        super().__init__(["osascript", "-l", "JavaScript", "-e", OSASCRIPT_SERVER], max_batch_size)
+
+
+class RecordingBackend(ScriptBackend):
+    """Acknowledges scripts without running them, after delay seconds each, and keeps them in scripts"""
+
+    def __init__(self, delay: float = 0.0, max_batch_size: int = MAX_BATCH_SIZE):
+        super().__init__([sys.executable, "-c", RECORDER_SERVER, str(delay)], max_batch_size)
+        self.scripts = []
+
+    async def execute(self, scripts: list[str]) -> list[dict]:
+        self.scripts.extend(scripts)
+        return await super().execute(scripts)
+
+
+# KEYNOTE_BACKEND=recording serves the tools without touching Keynote
+backend = RecordingBackend() if os.getenv("KEYNOTE_BACKEND") == "recording" else OsascriptBackend()
+
+
+def applescript_string(text: str) -> str:
+    """Quote text as an AppleScript string literal"""
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+async def mac_open_keynote() -> dict:
+    """Open Keynote on macOS and create a new document."""
+    try:
+        # AppleScript to open Keynote and create a new document, it returns once the document exists
+        applescript = '''
+        tell application "Keynote"
+            activate
+            if (count of documents) = 0 then
+                set newDoc to make new document
+            end if
+        end tell
+        '''
+        await backend.run(applescript)
+
+        return {
+            "content": [
+                {
+                    "type": "text",
+                    "text": "Keynote opened successfully with a new document"
+                }
+            ]
+        }
+    except Exception as e:
+        return {
+            "content": [
+                {
+                    "type": "text",
+                    "text": f"Error opening Keynote: {str(e)}"
+                }
+            ]
+        }
+
+
+async def mac_draw_rectangle() -> dict:
+    # async def mac_draw_rectangle(x1: int, y1: int, x2: int, y2: int) -> dict:
+    """Draw a rectangle in Keynote on macOS from (x1,y1) to (x2,y2).  Keynote must be open before calling this tool."""
+
+    x1 = 780;
+    y1 = 380;
+    x2= 1140;
+    y2= 700;
+
+    try:
+        # Convert (x1, y1, x2, y2) to width and height
+        width = abs(x2 - x1)
+        height = abs(y2 - y1)
+
+        # AppleScript to add a rectangle to the current slide, checking first that Keynote is
+        # running so the check costs no extra round trip
+        applescript = f'''
+        if application "Keynote" is running then
+            tell application "Keynote"
+                activate
+                tell front document
+                    tell current slide
+                        make new shape at end of shapes
+                        set position of last shape to {{{x1}, {y1}}}
+                        set width of last shape to {width}
+                        set height of last shape to {height}
+                    end tell
+                end tell
+            end tell
+            return "true"
+        end if
+        return "false"
+        '''
+        result = await backend.run(applescript)
+        if "true" not in result.lower():
+            return {
+                "content": [
+                    TextContent(
+                        type="text",
+                        text="Keynote is not open. Please call mac_open_keynote first."
+                    )
+                ]
+            }
+
+        return {
+            "content": [
+                TextContent(
+                    type="text",
+                    text=f"Rectangle drawn in Keynote from ({x1},{y1}) to ({x2},{y2})"
+                )
+            ]
+        }
+    except Exception as e:
+        return {
+            "content": [
+                TextContent(
+                    type="text",
+                    text=f"Error drawing rectangle in Keynote: {str(e)}"
+                )
+            ]
+        }
+
+
+async def mac_add_text_in_keynote(text: str) -> dict:
+    """Add text in Keynote on macOS inside a rectangle shape. Keynote must be open and rectangle must be drawn before calling this tool."""
+    try:
+        # AppleScript to add text to the current slide in Keynote, if it is running
+        applescript = f'''
+        if application "Keynote" is running then
+            tell application "Keynote"
+                activate
+            end tell
+
+            tell application "System Events"
+                tell process "Keynote"
+                    -- Click on the last shape (assuming it's at the center of the slide)
+                    click at {{960, 540}}
+                    delay 0.5
+
+                    -- Press Command+T to add text
+                    keystroke "t" using command down
+                    delay 0.5
+
+                    -- Type the text
+                    keystroke {applescript_string(text)}
+                end tell
+            end tell
+            return "true"
+        end if
+        return "false"
+        '''
+        result = await backend.run(applescript)
+        if "true" not in result.lower():
+            return {
+                "content": [
+                    TextContent(
+                        type="text",
+                        text="Keynote is not open. Please open keynote first."
+                    )
+                ]
+            }
+
+        return {
+            "content": [
+                TextContent(
+                    type="text",
+                    text=f"Text '{text}' added successfully to Keynote"
+                )
+            ]
+        }
+    except Exception as e:
+        return {
+            "content": [
+                TextContent(
+                    type="text",
+                    text=f"Error adding text to Keynote: {str(e)}"
+                )
+            ]
+        }
+
+
+def register(mcp: FastMCP) -> None:
+    """Add the Keynote tools to mcp"""
+    mcp.tool()(mac_open_keynote)
+    mcp.tool()(mac_draw_rectangle)
+    mcp.tool()(mac_add_text_in_keynote)
@@ -1,31 +1,209 @@
 # basic import 
-from mcp.server.fastmcp import FastMCP, Image
+from mcp.server.fastmcp import FastMCP
 from mcp.server.fastmcp.prompts import base
 from mcp.types import TextContent
 from mcp import types
-from PIL import Image as PILImage
+import ast
+import decimal
+import functools
+import importlib
+import importlib.util
+import inspect
+import itertools
+import json
 import math
+import operator
+import os
 import sys
+import threading
 import time
+from collections import OrderedDict
+
+from mcp_metrics import instrument, payload_size
+from mcp_workers import run_heavy, shutdown_process_pool
 
 # from pywinauto.application import Application
 # import win32gui
 # import win32con
 # from win32api import GetSystemMetrics
 
-import subprocess
 import platform
 
 #win32gui / win32con	pyobjc (AppKit, Quartz)
 #win32api	osascript,
 #pywinauto	pyautogui
 
-from AppKit import NSWorkspace
 # import pyautogui
 #import psutil
 
 # instantiate an MCP server client
 mcp = FastMCP("Calculator")
+# Record per-tool metrics, served as the metrics://tools resource
+metrics = instrument(mcp)
+
+# Results such as factorial(50000) have far more digits than the default int to str limit
+if hasattr(sys, "set_int_max_str_digits"):
+    sys.set_int_max_str_digits(0)
+
+# Default byte budget of each memoized tool's result cache
+RESULT_CACHE_BYTES = 16 * 2**20
+# Heavy tool calls are refused when their result would have more decimal digits than this.
+# int to str is quadratic, half a million digits still encode well within HEAVY_TOOL_TIMEOUT
+MAX_RESULT_DIGITS = 500000
+# Heavy tool calls whose result has at most this many bits are computed inline, a pool round trip costs more
+INLINE_RESULT_BITS = 2**16
+
+def check_result_bits(name: str, bits: float) -> None:
+    """Refuse calls whose result would be too large to compute, encode and send back"""
+    digits = bits * math.log10(2)
+    if digits > MAX_RESULT_DIGITS:
+        raise ValueError(
+            f"{name} result would have about {int(digits)} digits, more than the {MAX_RESULT_DIGITS} digit limit"
+        )
+
+def compute_json(fn, arguments: dict) -> tuple:
+    """Return fn(**arguments) and its JSON text, runs in the worker pool so encoding is timed too"""
+    value = fn(**arguments)
+    return value, json.dumps(value)
+
+class ResultCache:
+    """LRU cache of tool results bounded by their approximate JSON size, with an optional TTL"""
+    def __init__(self, max_bytes: int, ttl: float | None = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> [expires, value, size, json text or None]
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key) -> list | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] < time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, value) -> list:
+        # Keys count too, a list argument is kept in the key as a tuple
+        size = payload_size(key) + payload_size(value)
+        entry = [time.monotonic() + self.ttl if self.ttl else None, value, size, None]
+        if size > self.max_bytes:
+            return entry
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = entry
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+        return entry
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+            }
+
+    def _drop(self, key) -> None:
+        self.bytes -= self.entries.pop(key)[2]
+
+# Result caches of the memoized tools, by tool name
+RESULT_CACHES = {}
+
+def cache_key(arguments: dict):
+    """Hashable key for bound tool arguments, lists become tuples"""
+    def freeze(value):
+        if isinstance(value, (list, tuple)):
+            return tuple(freeze(v) for v in value)
+        return value
+    return tuple((name, freeze(value)) for name, value in arguments.items())
+
+def cached_tool(max_bytes: int = RESULT_CACHE_BYTES, ttl: float | None = None, result_bits=None,
+                heavy_if=None):
+    """Register a pure function as a tool whose results are memoized.
+
+    Returns the memoized function for direct calls. The registered tool
+    serves the cached JSON text, so repeated hits skip encoding as well.
+    Passing result_bits, an estimate of the result size from the arguments,
+    marks the tool as heavy: cache misses are size checked, then computed
+    and JSON encoded in the worker pool under HEAVY_TOOL_TIMEOUT. Calls
+    estimated at no more than INLINE_RESULT_BITS are computed inline.
+    heavy_if, a predicate on the arguments, replaces that estimate based
+    choice.
+    """
+    def decorator(fn):
+        cache = RESULT_CACHES[fn.__name__] = ResultCache(max_bytes, ttl)
+        signature = inspect.signature(fn)
+
+        def lookup(args, kwargs) -> list:
+            # Bind so positional and keyword calls share entries
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = cache_key(bound.arguments)
+            entry = cache.get(key)
+            if entry is None:
+                entry = cache.put(key, fn(*args, **kwargs))
+            return entry
+
+        @functools.wraps(fn)
+        def memoized(*args, **kwargs):
+            return lookup(args, kwargs)[1]
+
+        def serve(args, kwargs) -> TextContent:
+            entry = lookup(args, kwargs)
+            if entry[3] is None:
+                entry[3] = json.dumps(entry[1])
+            return TextContent(type="text", text=entry[3])
+
+        @functools.wraps(fn)
+        def tool(*args, **kwargs):
+            return serve(args, kwargs)
+
+        @functools.wraps(fn)
+        async def heavy_tool(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = cache_key(bound.arguments)
+            bits = result_bits(**bound.arguments)
+            heavy = heavy_if(**bound.arguments) if heavy_if is not None else bits > INLINE_RESULT_BITS
+            if not heavy:
+                return serve(args, kwargs)
+            entry = cache.get(key)
+            # Entries stored by direct calls have no JSON text yet, encoding it here would block the loop
+            if entry is None or entry[3] is None:
+                check_result_bits(fn.__name__, bits)
+                # The module level name pickles, the undecorated fn would not
+                worker_fn = getattr(sys.modules[fn.__module__], fn.__name__)
+                value, text = await run_heavy(functools.partial(compute_json, worker_fn, bound.arguments))
+                entry = cache.put(key, value)
+                entry[3] = text
+            return TextContent(type="text", text=entry[3])
+
+        if result_bits is not None:
+            tool = heavy_tool
+
+        tool.__signature__ = signature.replace(return_annotation=TextContent)
+        mcp.tool()(tool)
+        memoized.cache = cache
+        # evaluate checks calls to heavy tools with it too
+        memoized.result_bits = result_bits
+        return memoized
+    return decorator
 
 # DEFINE TOOLS
 
@@ -38,7 +216,7 @@ def add(a: int, b: int) -> int:
 
 @mcp.tool()
 def add_list(l: list) -> int:
-    """Add all numbers in a list"""
+    """Add all numbers in a list. For numbers stored in a file use dataset_reduce"""
     print("CALLED: add(l: list) -> int:")
     return sum(l)
 
@@ -64,7 +242,7 @@ def divide(a: int, b: int) -> float:
     return float(a / b)
 
 # power tool
-@mcp.tool()
+@cached_tool(result_bits=lambda a, b: b * math.log2(abs(a)) if abs(a) > 1 and b > 0 else 64)
 def power(a: int, b: int) -> int:
     """Power of two numbers"""
     print("CALLED: power(a: int, b: int) -> int:")
@@ -85,7 +263,7 @@ def cbrt(a: int) -> float:
     return float(a ** (1/3))
 
 # factorial tool
-@mcp.tool()
+@cached_tool(result_bits=lambda a: a * math.log2(a) if a > 1 else 1)
 def factorial(a: int) -> int:
     """factorial of a number"""
     print("CALLED: factorial(a: int) -> int:")
@@ -133,36 +311,591 @@ def mine(a: int, b: int) -> int:
     print("CALLED: mine(a: int, b: int) -> int:")
     return int(a - b - b)
 
-@mcp.tool()
-def create_thumbnail(image_path: str) -> Image:
-    """Create a thumbnail from an image"""
-    print("CALLED: create_thumbnail(image_path: str) -> Image:")
-    img = PILImage.open(image_path)
-    img.thumbnail((100, 100))
-    return Image(data=img.tobytes(), format="png")
-
 @mcp.tool()
 def strings_to_chars_to_int(string: str) -> list[int]:
     """Return the ASCII values of the characters in a word"""
     print("CALLED: strings_to_chars_to_int(string: str) -> list[int]:")
     return [int(ord(char)) for char in string]
 
-@mcp.tool()
-def int_list_to_exponential_sum(int_list: list) -> float:
-    """Return sum of exponentials of numbers in a list"""
-    print("CALLED: int_list_to_exponential_sum(int_list: list) -> float:")
-    return sum(math.exp(i) for i in int_list)
+# Natural log of the largest float, sums of exponentials past it are returned in log space
+MAX_FLOAT_LOG = math.log(sys.float_info.max)
+MAX_DECIMAL_PRECISION = 10000
+# Longer lists, and every decimal precision call, are summed in the worker pool
+EXPONENTIAL_SUM_INLINE_VALUES = 100000
 
-@mcp.tool()
-def fibonacci_numbers(n: int) -> list:
-    """Return the first n Fibonacci Numbers"""
-    print("CALLED: fibonacci_numbers(n: int) -> list:")
+def log_space_result(log_value: float) -> dict:
+    """Describe exp(log_value), too large for a float, by its log and in scientific notation"""
+    exponent10 = math.floor(log_value / math.log(10))
+    mantissa = math.exp(log_value - exponent10 * math.log(10))
+    return {"log": log_value, "scientific": f"{mantissa:.12g}e+{exponent10}"}
+
+def exponential_sum_bits(int_list: list, precision: int | None) -> float:
+    """Bits of the int_list_to_exponential_sum result, a float or precision decimal digits"""
+    return math.log2(10) * (precision or 17)
+
+def exponential_sum_is_heavy(int_list: list, precision: int | None) -> bool:
+    return precision is not None or len(int_list) > EXPONENTIAL_SUM_INLINE_VALUES
+
+@cached_tool(result_bits=exponential_sum_bits, heavy_if=exponential_sum_is_heavy)
+def int_list_to_exponential_sum(int_list: list, precision: int | None = None) -> float | dict | str:
+    """Return sum of exponentials of numbers in a list. A sum too large for a float is returned as {"log": natural log of the sum, "scientific": "1.23e+1000"}. Passing precision computes it in decimal arithmetic to that many significant digits, returned as a string"""
+    print("CALLED: int_list_to_exponential_sum(int_list: list, precision: int | None = None) -> float | dict | str:")
+    if precision is not None:
+        if not 1 <= precision <= MAX_DECIMAL_PRECISION:
+            raise ValueError(f"precision must be between 1 and {MAX_DECIMAL_PRECISION}")
+        with decimal.localcontext() as context:
+            context.prec = precision
+            context.Emax = decimal.MAX_EMAX
+            context.Emin = decimal.MIN_EMIN
+            return str(sum((decimal.Decimal(str(i)).exp() for i in int_list), decimal.Decimal(0)))
+
+    import numpy as np
+    if not int_list:
+        return 0.0
+    try:
+        values = np.asarray(int_list, dtype=np.float64)
+    except OverflowError:
+        raise ValueError("int_list values must fit in a float, pass precision for larger ones")
+    # Log-sum-exp: exp(largest) * sum(exp(value - largest)) never overflows in between
+    largest = float(values.max())
+    scaled_sum = float(np.exp(values - largest).sum())
+    log_sum = largest + math.log(scaled_sum)
+    if log_sum < MAX_FLOAT_LOG:
+        result = math.exp(largest) * scaled_sum
+        if math.isfinite(result):
+            return result
+    return log_space_result(log_sum)
+
+# F(k) has about k * log10(phi) decimal digits
+FIBONACCI_DIGITS_PER_INDEX = math.log10((1 + math.sqrt(5)) / 2)
+
+def fibonacci_window(start: int) -> int:
+    """Most Fibonacci numbers from F(start) on whose digits together stay within MAX_RESULT_DIGITS"""
+    # The digits of F(start) .. F(start + n - 1) add up to about c * n * (start + n / 2), solved for n
+    start = max(start, 0)
+    return int(math.sqrt(start * start + 2 * MAX_RESULT_DIGITS / FIBONACCI_DIGITS_PER_INDEX) - start)
+
+def fibonacci_numbers_bits(n: int, start: int) -> float:
+    """Bits of the fibonacci_numbers result, windows past fibonacci_window are refused by the tool itself"""
+    n = min(max(n, 0), fibonacci_window(start))
+    return math.log2(10) * FIBONACCI_DIGITS_PER_INDEX * n * (max(start, 0) + n / 2)
+
+# Most Fibonacci numbers returned by one fibonacci_numbers call, larger ranges are paged with start
+MAX_FIBONACCI_WINDOW = fibonacci_window(0)
+
+def fibonacci_pair(n: int) -> tuple[int, int]:
+    """Return (F(n), F(n+1)) by fast doubling, in O(log n) big int multiplications"""
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)  # F(2k)
+        d = a * a + b * b  # F(2k+1)
+        a, b = (d, c + d) if bit == "1" else (c, d)
+    return a, b
+
+def iter_fibonacci(start: int, count: int):
+    """Yield count Fibonacci numbers from F(start) on, holding only two terms at a time"""
+    a, b = fibonacci_pair(start)
+    for _ in range(count):
+        yield a
+        a, b = b, a + b
+
+@cached_tool(result_bits=lambda n: 0.695 * n)
+def fibonacci_nth(n: int) -> int:
+    """Return the n-th Fibonacci Number, F(0) = 0"""
+    print("CALLED: fibonacci_nth(n: int) -> int:")
+    if n < 0:
+        raise ValueError("n must not be negative")
+    return fibonacci_pair(n)[0]
+
+@cached_tool(result_bits=fibonacci_numbers_bits)
+def fibonacci_numbers(n: int, start: int = 0) -> list:
+    """Return n Fibonacci Numbers starting at F(start), the first n by default. Page through long sequences by raising start"""
+    print("CALLED: fibonacci_numbers(n: int, start: int = 0) -> list:")
     if n <= 0:
         return []
-    fib_sequence = [0, 1]
-    for _ in range(2, n):
-        fib_sequence.append(fib_sequence[-1] + fib_sequence[-2])
-    return fib_sequence[:n]
+    if start < 0:
+        raise ValueError("start must not be negative")
+    window = fibonacci_window(start)
+    if window < 1:
+        raise ValueError(f"F({start}) alone has more than {MAX_RESULT_DIGITS} digits")
+    if n > window:
+        raise ValueError(
+            f"At most {window} numbers from start={start} per call, "
+            f"request the rest with start={start + window}"
+        )
+    return list(iter_fibonacci(start, n))
+
+# Element-wise versions of the scalar tools above, used by the batch tools
+# NumPy functions are named rather than referenced, so numpy is only imported by the first batch call
+UNARY_OPERATIONS = {
+    "sqrt": "sqrt",
+    "cbrt": "cbrt",
+    "log": "log",
+    "exp": "exp",
+    "sin": "sin",
+    "cos": "cos",
+    "tan": "tan",
+}
+# Fallbacks for ints too large to convert to float64
+UNARY_SCALAR_OPERATIONS = {
+    "sqrt": math.sqrt,
+    "cbrt": lambda a: a ** (1/3),
+    "log": math.log,
+    "exp": math.exp,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+}
+BINARY_OPERATIONS = {
+    "add": "add",
+    "subtract": "subtract",
+    "multiply": "multiply",
+    "divide": "true_divide",
+    "power": "power",
+    "remainder": "mod",
+    "mine": lambda a, b: a - b - b,
+}
+# Exact Python versions, for ints too large to convert to float64
+BINARY_SCALAR_OPERATIONS = {
+    "add": operator.add,
+    "subtract": operator.sub,
+    "multiply": operator.mul,
+    "divide": lambda a, b: float(a / b),
+    "power": operator.pow,
+    "remainder": operator.mod,
+    "mine": lambda a, b: a - b - b,
+}
+# Integer results must stay below this to be computed in int64, otherwise exact Python ints are used
+INT64_SAFE_LIMIT = 2**62
+# Largest JSON size, in bytes, of a whole batch result, estimated before computing it
+MAX_BATCH_RESULT_BYTES = 64 * 2**20
+
+def broadcast_pairs(a: list, b: list) -> zip:
+    """Pairs of elements batch_apply_binary combines, a single number is repeated"""
+    if len(a) == 1:
+        a = a * len(b)
+    elif len(b) == 1:
+        b = b * len(a)
+    return zip(a, b)
+
+def is_plain_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def fits_int64(value: int) -> bool:
+    return -2**63 <= value < 2**63
+
+def apply_batch_element_bits(operation: str, values: list) -> list[float]:
+    """Bits of each apply_batch result, only factorials grow past a float"""
+    if operation == "factorial":
+        return [factorial.result_bits(int(v)) for v in values]
+    return [64] * len(values)
+
+def apply_batch_bits(operation: str, values: list) -> float:
+    """Bits of the largest apply_batch result"""
+    return max(apply_batch_element_bits(operation, values), default=0)
+
+def apply_batch(operation: str, values: list) -> list:
+    """Apply a unary operation to every value, the implementation behind batch_apply"""
+    import numpy as np
+    if operation == "factorial":
+        return [math.factorial(int(v)) for v in values]
+    if operation not in UNARY_OPERATIONS:
+        raise ValueError(f"Unknown operation {operation}, expected factorial or one of {', '.join(UNARY_OPERATIONS)}")
+    try:
+        array = np.asarray(values, dtype=np.float64)
+    except OverflowError:
+        return [float(UNARY_SCALAR_OPERATIONS[operation](v)) for v in values]
+    with np.errstate(all="ignore"):
+        return getattr(np, UNARY_OPERATIONS[operation])(array).tolist()
+
+def apply_batch_binary_element_bits(operation: str, a: list, b: list) -> list[float]:
+    """Bits of each apply_batch_binary result, exact int powers and products can grow past a float"""
+    bits = []
+    for x, y in broadcast_pairs(a, b):
+        if not (is_plain_int(x) and is_plain_int(y)):
+            bits.append(64)
+        elif operation == "power":
+            bits.append(max(power.result_bits(x, y), 64))
+        elif operation == "multiply":
+            bits.append(x.bit_length() + y.bit_length())
+        else:
+            bits.append(max(x.bit_length(), y.bit_length()) + 2)
+    return bits
+
+def apply_batch_binary_bits(operation: str, a: list, b: list) -> float:
+    """Bits of the largest apply_batch_binary result"""
+    return max(apply_batch_binary_element_bits(operation, a, b), default=0)
+
+def apply_batch_binary(operation: str, a: list, b: list) -> list:
+    """Apply a binary operation element-wise, the implementation behind batch_apply_binary"""
+    import numpy as np
+    if operation not in BINARY_OPERATIONS:
+        raise ValueError(f"Unknown operation {operation}, expected one of {', '.join(BINARY_OPERATIONS)}")
+    if operation in ("divide", "remainder") and any(v == 0 for v in b):
+        # As the scalar divide and remainder tools do
+        raise ZeroDivisionError(f"{operation} by zero")
+    func = BINARY_OPERATIONS[operation]
+    if isinstance(func, str):
+        func = getattr(np, func)
+
+    all_ints = all(is_plain_int(v) for v in (*a, *b))
+    if not all_ints or operation == "divide" or (operation == "power" and any(v < 0 for v in b)):
+        try:
+            float_a, float_b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+        except OverflowError:
+            scalar = BINARY_SCALAR_OPERATIONS[operation]
+            return [scalar(x, y) for x, y in broadcast_pairs(a, b)]
+        with np.errstate(all="ignore"):
+            return func(float_a, float_b).tolist()
+
+    # Use int64 when every input and no result can overflow it, exact Python ints otherwise
+    try:
+        if not all(fits_int64(v) for v in (*a, *b)):
+            raise OverflowError
+        with np.errstate(all="ignore"):
+            abs_a = np.abs(np.asarray(a, dtype=np.float64))
+            abs_b = np.abs(np.asarray(b, dtype=np.float64))
+            if operation == "multiply":
+                bound = abs_a * abs_b
+            elif operation == "power":
+                bound = abs_a ** abs_b
+            elif operation == "remainder":
+                bound = abs_b
+            else:
+                bound = abs_a + 2 * abs_b
+            int64_safe = bool(np.all(bound < INT64_SAFE_LIMIT))
+    except OverflowError:
+        int64_safe = False
+    dtype = np.int64 if int64_safe else object
+    return func(np.asarray(a, dtype=dtype), np.asarray(b, dtype=dtype)).tolist()
+
+# evaluate checks calls to the batch implementations with their estimates too
+apply_batch.result_bits = apply_batch_bits
+apply_batch_binary.result_bits = apply_batch_binary_bits
+
+async def run_batch(fn, element_bits: list[float], arguments: dict) -> TextContent:
+    """Size check a batch call, then run it inline or, when its results outgrow machine words, in the worker pool"""
+    # Each result is held to the single result limit, the batch as a whole to MAX_BATCH_RESULT_BYTES
+    largest = max(element_bits, default=0)
+    check_result_bits(fn.__name__, largest)
+    size = sum(element_bits) * math.log10(2) + 2 * len(element_bits)
+    if size > MAX_BATCH_RESULT_BYTES:
+        raise ValueError(
+            f"{fn.__name__} result would be about {int(size)} bytes, more than the {MAX_BATCH_RESULT_BYTES} byte limit"
+        )
+    if largest <= 64:
+        return TextContent(type="text", text=json.dumps(fn(**arguments)))
+    _, text = await run_heavy(functools.partial(compute_json, fn, arguments))
+    return TextContent(type="text", text=text)
+
+@mcp.tool()
+async def batch_apply(operation: str, values: list) -> TextContent:
+    """Apply sqrt, cbrt, log, exp, sin, cos, tan or factorial to every number in a list in one call"""
+    print("CALLED: batch_apply(operation: str, values: list) -> TextContent:")
+    return await run_batch(
+        apply_batch, apply_batch_element_bits(operation, values), {"operation": operation, "values": values}
+    )
+
+@mcp.tool()
+async def batch_apply_binary(operation: str, a: list, b: list) -> TextContent:
+    """Apply add, subtract, multiply, divide, power, remainder or mine element-wise to two lists. A list with a single number is broadcast against the other list"""
+    print("CALLED: batch_apply_binary(operation: str, a: list, b: list) -> TextContent:")
+    return await run_batch(
+        apply_batch_binary, apply_batch_binary_element_bits(operation, a, b), {"operation": operation, "a": a, "b": b}
+    )
+
+# Elements (memory-mapped files) or lines (CSV) reduced at a time by dataset_reduce
+DATASET_CHUNK_SIZE = 1 << 20
+DATASET_REDUCTIONS = ("sum", "mean", "exp_sum", "min", "max", "histogram", "summary")
+MAX_HISTOGRAM_BINS = 10000
+
+def iter_dataset_chunks(path: str, dtype: str = "float64", column: int | None = None):
+    """Yield the numbers of a dataset file as 1-D NumPy arrays of at most DATASET_CHUNK_SIZE values.
+
+    .npy files and raw binary files of dtype values are memory-mapped, so a
+    chunk is a view of the page cache. CSV and text files are streamed and
+    parsed a chunk of lines at a time; column picks one column, a header
+    line is skipped.
+    """
+    import numpy as np
+    path = os.path.expanduser(path)
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".csv", ".txt", ".tsv"):
+        delimiter = "\t" if extension == ".tsv" else ("," if extension == ".csv" else None)
+        with open(path) as f:
+            first = f.readline()
+            fields = first.split(delimiter)
+            try:
+                [float(field) for field in (fields if column is None else fields[column:column + 1])]
+                pending = [first]
+            except ValueError:
+                pending = []
+            while True:
+                lines = pending + list(itertools.islice(f, DATASET_CHUNK_SIZE - len(pending)))
+                pending = []
+                if not lines:
+                    return
+                chunk = np.loadtxt(lines, delimiter=delimiter, usecols=column, ndmin=1, dtype=np.float64)
+                yield chunk.ravel()
+    if extension == ".npy":
+        data = np.load(path, mmap_mode="r")
+    else:
+        data = np.memmap(path, dtype=np.dtype(dtype), mode="r")
+    if not (np.issubdtype(data.dtype, np.number) or data.dtype == np.bool_):
+        raise ValueError(f"{path} holds {data.dtype} values, not numbers")
+    if column is not None:
+        # A column is strided, slicing rows first copies only one chunk of it at a time
+        for start in range(0, data.shape[0], DATASET_CHUNK_SIZE):
+            yield np.ravel(data[start:start + DATASET_CHUNK_SIZE, column])
+        return
+    # order K flattens C and Fortran ordered files without copying them
+    data = np.ravel(data, order="K")
+    for start in range(0, data.size, DATASET_CHUNK_SIZE):
+        yield data[start:start + DATASET_CHUNK_SIZE]
+
+def integer_chunk_sum(chunk) -> int:
+    """Exact sum of an integer or bool chunk.
+
+    Chunks of up to 32-bit values cannot overflow a 64-bit sum, unsigned
+    ones are summed in uint64 and signed ones in int64. 64-bit values are
+    summed that way only when their largest magnitude times the chunk size
+    fits, otherwise as Python ints.
+    """
+    import numpy as np
+    unsigned = chunk.dtype == np.bool_ or np.issubdtype(chunk.dtype, np.unsignedinteger)
+    accumulator = np.uint64 if unsigned else np.int64
+    if chunk.dtype.itemsize == 8:
+        largest = max(abs(int(chunk.min())), abs(int(chunk.max())))
+        if largest * chunk.size >= (2**64 if unsigned else 2**63):
+            return int(chunk.astype(object).sum())
+    return int(chunk.sum(dtype=accumulator))
+
+def reduce_dataset(path: str, reduction: str = "summary", dtype: str = "float64", column: int | None = None,
+                   bins: int = 10):
+    """Reduce a dataset file chunk by chunk, never holding more than one chunk in memory"""
+    import numpy as np
+    if reduction not in DATASET_REDUCTIONS:
+        raise ValueError(f"Unknown reduction {reduction}, expected one of {', '.join(DATASET_REDUCTIONS)}")
+    if reduction == "histogram":
+        if not 1 <= bins <= MAX_HISTOGRAM_BINS:
+            raise ValueError(f"bins must be between 1 and {MAX_HISTOGRAM_BINS}")
+        # Bin edges need the range first, a second pass is cheaper than keeping the data
+        summary = reduce_dataset(path, "summary", dtype, column)
+        if not summary["count"]:
+            return {"counts": [0] * bins, "edges": []}
+        counts = np.zeros(bins, dtype=np.int64)
+        for chunk in iter_dataset_chunks(path, dtype, column):
+            chunk_counts, edges = np.histogram(chunk, bins=bins, range=(summary["min"], summary["max"]))
+            counts += chunk_counts
+        return {"counts": counts.tolist(), "edges": edges.tolist()}
+
+    count = 0
+    total = 0
+    low = high = None
+    # Running log-sum-exp: the sum of exp(x) is exp(exp_max) * exp_scaled
+    exp_max, exp_scaled = -math.inf, 0.0
+    for chunk in iter_dataset_chunks(path, dtype, column):
+        if not chunk.size:
+            continue
+        count += chunk.size
+        if reduction in ("sum", "mean", "summary"):
+            integral = np.issubdtype(chunk.dtype, np.integer) or chunk.dtype == np.bool_
+            # Integer chunks sum exactly, their totals add up as Python ints
+            total += integer_chunk_sum(chunk) if integral else float(chunk.sum(dtype=np.float64))
+        if reduction in ("min", "max", "summary"):
+            chunk_low, chunk_high = chunk.min().item(), chunk.max().item()
+            low = chunk_low if low is None else min(low, chunk_low)
+            high = chunk_high if high is None else max(high, chunk_high)
+        if reduction == "exp_sum":
+            values = chunk.astype(np.float64, copy=False)
+            chunk_max = float(values.max())
+            if chunk_max > exp_max:
+                exp_scaled *= math.exp(exp_max - chunk_max)
+                exp_max = chunk_max
+            exp_scaled += float(np.exp(values - exp_max).sum())
+
+    if reduction == "exp_sum":
+        if not count:
+            return 0.0
+        log_sum = exp_max + math.log(exp_scaled)
+        if log_sum < MAX_FLOAT_LOG and math.isfinite(math.exp(exp_max) * exp_scaled):
+            return math.exp(exp_max) * exp_scaled
+        return log_space_result(log_sum)
+    mean = total / count if count else None
+    if reduction == "summary":
+        return {"count": count, "sum": total, "mean": mean, "min": low, "max": high}
+    return {"sum": total, "mean": mean, "min": low, "max": high}[reduction]
+
+@mcp.tool()
+async def dataset_reduce(path: str, reduction: str = "summary", dtype: str = "float64", column: int | None = None,
+                         bins: int = 10) -> float | int | dict | None:
+    """Reduce the numbers in a file without sending them: sum, mean, exp_sum, min, max, histogram (bins counts and edges) or summary (count, sum, mean, min, max). Reads .npy, raw binary files of dtype values (e.g. float32, int16) and CSV/TXT files, where column picks one column"""
+    print("CALLED: dataset_reduce(path: str, reduction: str = \"summary\", dtype: str = \"float64\", column: int | None = None, bins: int = 10) -> float | int | dict | None:")
+    return await run_heavy(functools.partial(reduce_dataset, path, reduction, dtype, column, bins))
+
+@mcp.tool()
+def get_cache_stats() -> dict:
+    """Hit/miss counters and sizes of the memoized tool result caches"""
+    print("CALLED: get_cache_stats() -> dict:")
+    return {name: cache.stats() for name, cache in RESULT_CACHES.items()}
+
+# Functions an expression passed to evaluate may call: the pure calculator tools and a few builtins
+EXPRESSION_FUNCTIONS = {
+    func.__name__: func
+    for func in (
+        add, add_list, subtract, multiply, divide, power, sqrt, cbrt, factorial, log, remainder,
+        sin, cos, tan, mine, strings_to_chars_to_int, int_list_to_exponential_sum,
+        fibonacci_numbers, fibonacci_nth,
+    )
+}
+EXPRESSION_FUNCTIONS.update(
+    batch_apply=apply_batch, batch_apply_binary=apply_batch_binary, dataset_reduce=reduce_dataset,
+)
+EXPRESSION_FUNCTIONS.update(abs=abs, min=min, max=max, round=round, len=len, sum=sum)
+EXPRESSION_CONSTANTS = {"pi": math.pi, "e": math.e}
+EXPRESSION_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+EXPRESSION_UNARY_OPERATORS = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+MAX_EXPRESSION_NODES = 1000
+# Largest parsed expression, in syntax tree nodes, compile_expression looks at
+MAX_EXPRESSION_SYNTAX_NODES = 10 * MAX_EXPRESSION_NODES
+# Largest integer ** result, in bits, evaluate will compute
+MAX_POWER_BITS = 10**6
+# Largest JSON size, in bytes, of any value evaluate builds, estimated before building sequences
+MAX_EXPRESSION_BYTES = 16 * 2**20
+
+def expression_parts(node: ast.AST) -> tuple:
+    """(kind, payload, child syntax nodes) of a whitelisted syntax node, anything else is rejected"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)) and not isinstance(node.value, bool):
+        return "const", node.value, ()
+    if isinstance(node, ast.Name) and node.id in EXPRESSION_CONSTANTS:
+        return "const", EXPRESSION_CONSTANTS[node.id], ()
+    if isinstance(node, ast.BinOp) and type(node.op) in EXPRESSION_BINARY_OPERATORS:
+        return "binary", type(node.op), (node.left, node.right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in EXPRESSION_UNARY_OPERATORS:
+        return "unary", type(node.op), (node.operand,)
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return "list", None, tuple(node.elts)
+    if isinstance(node, ast.Subscript) and not isinstance(node.slice, ast.Slice):
+        return "index", None, (node.value, node.slice)
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in EXPRESSION_FUNCTIONS and not node.keywords):
+        return "call", node.func.id, tuple(node.args)
+    raise ValueError(f"Unsupported expression element: {ast.unparse(node)}")
+
+def compile_expression(expression: str) -> list[tuple]:
+    """Parse an expression into a DAG of (kind, payload, child indexes) nodes.
+
+    Structurally identical subexpressions map to a single node, so each is
+    evaluated once. Children always come before their parents and the root
+    is the last node. Anything outside the whitelisted syntax is rejected.
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval").body
+    except RecursionError:
+        raise ValueError("Expression is nested too deeply")
+    if sum(1 for _ in ast.walk(tree)) > MAX_EXPRESSION_SYNTAX_NODES:
+        raise ValueError(f"Expression has more than {MAX_EXPRESSION_SYNTAX_NODES} syntax elements")
+    nodes = []
+    index = {}  # (kind, payload type, payload, child indexes) -> node index
+    visited = {}  # id of a syntax node -> node index
+    # Post-order walk without recursion, so long chains such as 1+1+...+1 cannot exhaust the stack
+    stack = [(tree, False)]
+    while stack:
+        node, children_done = stack.pop()
+        kind, payload, children = expression_parts(node)
+        if not children_done:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+            continue
+        # Hash-consing on the children's indexes keeps every node O(1), the payload type keeps 1 and 1.0 apart
+        entry = (kind, payload, tuple(visited[id(child)] for child in children))
+        key = (kind, type(payload), *entry[1:])
+        if key not in index:
+            if len(nodes) >= MAX_EXPRESSION_NODES:
+                raise ValueError(f"Expression has more than {MAX_EXPRESSION_NODES} distinct parts")
+            nodes.append(entry)
+            index[key] = len(nodes) - 1
+        visited[id(node)] = index[key]
+    return nodes
+
+def check_expression_size(what: str, size: float) -> None:
+    """Refuse expression values whose JSON would be larger than MAX_EXPRESSION_BYTES"""
+    if size > MAX_EXPRESSION_BYTES:
+        raise ValueError(f"{what} would be about {int(size)} bytes, more than the {MAX_EXPRESSION_BYTES} byte limit")
+
+def evaluate_dag(nodes: list[tuple]):
+    """Evaluate the nodes built by compile_expression and return the value of the root.
+
+    Anything that could build a huge value is checked before it runs:
+    integer **, sequence repetition and concatenation, and calls to tools
+    with a result_bits estimate. Every value is checked after it is built.
+    """
+    values = []
+    sizes = []  # approximate JSON size of each value
+    for kind, payload, children in nodes:
+        args = [values[child] for child in children]
+        arg_sizes = [sizes[child] for child in children]
+        size = None
+        if kind == "const":
+            value = payload
+        elif kind == "binary":
+            left, right = args
+            if payload is ast.Pow and all(isinstance(arg, int) for arg in args):
+                if abs(left) > 1 and right > 0 and right * math.log2(abs(left)) > MAX_POWER_BITS:
+                    raise ValueError(f"{left} ** {right} is too large to compute")
+            elif payload is ast.Mult and isinstance(left, int) != isinstance(right, int):
+                # str or list repetition, estimated from the sequence's size and the count
+                count, sequence_size = (left, arg_sizes[1]) if isinstance(left, int) else (right, arg_sizes[0])
+                size = sequence_size * max(count, 0)
+                check_expression_size("Repetition", size)
+            elif payload is ast.Add and all(isinstance(arg, (str, list)) for arg in args):
+                size = sum(arg_sizes)
+                check_expression_size("Concatenation", size)
+            value = EXPRESSION_BINARY_OPERATORS[payload](*args)
+        elif kind == "unary":
+            value = EXPRESSION_UNARY_OPERATORS[payload](*args)
+        elif kind == "list":
+            value = args
+            size = 2 + sum(arg_sizes) + len(args)
+        elif kind == "index":
+            value = args[0][args[1]]
+            size = arg_sizes[0]
+        else:
+            func = EXPRESSION_FUNCTIONS[payload]
+            result_bits = getattr(func, "result_bits", None)
+            if result_bits is not None:
+                bound = inspect.signature(func).bind(*args)
+                bound.apply_defaults()
+                check_result_bits(payload, result_bits(**bound.arguments))
+            value = func(*args)
+        if isinstance(value, int):
+            check_result_bits("evaluate", value.bit_length())
+        if size is None:
+            size = payload_size(value)
+        check_expression_size("Expression value", size)
+        values.append(value)
+        sizes.append(size)
+    return values[-1]
+
+def evaluate_expression(expression: str) -> str:
+    """Compile and evaluate an expression and return its JSON text, runs in the worker pool"""
+    return json.dumps(evaluate_dag(compile_expression(expression)))
+
+@mcp.tool()
+async def evaluate(expression: str) -> TextContent:
+    """Evaluate a whole arithmetic expression in one call. Supports + - * / // % **, lists, indexing, pi, e and calls to the calculator tools, e.g. int_list_to_exponential_sum(strings_to_chars_to_int("INDIA")). Repeated subexpressions are computed once"""
+    print("CALLED: evaluate(expression: str) -> TextContent:")
+    # Parsing and compiling go to the worker with the evaluation, none of it runs on the event loop
+    text = await run_heavy(functools.partial(evaluate_expression, expression))
+    return TextContent(type="text", text=text)
 
 
 # @mcp.tool()
@@ -304,48 +1037,48 @@ def fibonacci_numbers(n: int) -> list:
 
 # @mcp.tool()
 # async def win_open_paint() -> dict:
-    """Open Microsoft Paint maximized on secondary monitor in Windows"""
-    global paint_app
-    try:
-        paint_app = Application().start('mspaint.exe')
-        time.sleep(0.2)
+#     """Open Microsoft Paint maximized on secondary monitor in Windows"""
+#     global paint_app
+#     try:
+#         paint_app = Application().start('mspaint.exe')
+#         time.sleep(0.2)
         
-        # Get the Paint window
-        paint_window = paint_app.window(class_name='MSPaintApp')
+#         # Get the Paint window
+#         paint_window = paint_app.window(class_name='MSPaintApp')
         
-        # Get primary monitor width
-        primary_width = GetSystemMetrics(0)
+#         # Get primary monitor width
+#         primary_width = GetSystemMetrics(0)
         
-        # First move to secondary monitor without specifying size
-        win32gui.SetWindowPos(
-            paint_window.handle,
-            win32con.HWND_TOP,
-            primary_width + 1, 0,  # Position it on secondary monitor
-            0, 0,  # Let Windows handle the size
-            win32con.SWP_NOSIZE  # Don't change the size
-        )
+#         # First move to secondary monitor without specifying size
+#         win32gui.SetWindowPos(
+#             paint_window.handle,
+#             win32con.HWND_TOP,
+#             primary_width + 1, 0,  # Position it on secondary monitor
+#             0, 0,  # Let Windows handle the size
+#             win32con.SWP_NOSIZE  # Don't change the size
+#         )
         
-        # Now maximize the window
-        win32gui.ShowWindow(paint_window.handle, win32con.SW_MAXIMIZE)
-        time.sleep(0.2)
+#         # Now maximize the window
+#         win32gui.ShowWindow(paint_window.handle, win32con.SW_MAXIMIZE)
+#         time.sleep(0.2)
         
-        return {
-            "content": [
-                TextContent(
-                    type="text",
-                    text="Paint opened successfully on secondary monitor and maximized"
-                )
-            ]
-        }
-    except Exception as e:
-        return {
-            "content": [
-                TextContent(
-                    type="text",
-                    text=f"Error opening Paint: {str(e)}"
-                )
-            ]
-        }
+#         return {
+#             "content": [
+#                 TextContent(
+#                     type="text",
+#                     text="Paint opened successfully on secondary monitor and maximized"
+#                 )
+#             ]
+#         }
+#     except Exception as e:
+#         return {
+#             "content": [
+#                 TextContent(
+#                     type="text",
+#                     text=f"Error opening Paint: {str(e)}"
+#                 )
+#             ]
+#         }
 # DEFINE RESOURCES
 
 # @mcp.tool()
@@ -427,181 +1160,40 @@ def debug_error(error: str) -> list[base.Message]:
         base.AssistantMessage("I'll help debug that. What have you tried so far?"),
     ]
 
-@mcp.tool()
-async def mac_open_keynote() -> dict:
-    """Open Keynote on macOS and create a new document."""
-    try:
-        # AppleScript to open Keynote and create a new document
-        applescript = '''
-        tell application "Keynote"
-            activate
-            if (count of documents) = 0 then
-                set newDoc to make new document
-            end if
-        end tell
-        '''
-        
-        # Run AppleScript
-        subprocess.run(["osascript", "-e", applescript])
-        time.sleep(1.5)  # Allow time for Keynote to open
-
-
-        return {
-            "content": [
-                {
-                    "type": "text",
-                    "text": "Keynote opened successfully with a new document"
-                }
-            ]
-        }
-    except Exception as e:
-        return {
-            "content": [
-                {
-                    "type": "text",
-                    "text": f"Error opening Keynote: {str(e)}"
-                }
-            ]
-        }
-    
-@mcp.tool()
-async def mac_draw_rectangle() -> dict:
-    # async def mac_draw_rectangle(x1: int, y1: int, x2: int, y2: int) -> dict:
-    """Draw a rectangle in Keynote on macOS from (x1,y1) to (x2,y2).  Keynote must be open before calling this tool."""
-
-    x1 = 780;
-    y1 = 380;
-    x2= 1140;
-    y2= 700;
-
-    try:
-        # Check if Keynote is running
-        applescript_check = '''
-        tell application "System Events"
-            return exists (processes where name is "Keynote")
-        end tell
-        '''
-        result = subprocess.run(["osascript", "-e", applescript_check], capture_output=True, text=True)
-        if "true" not in result.stdout.lower():
-            return {
-                "content": [
-                    TextContent(
-                        type="text",
-                        text="Keynote is not open. Please call mac_open_keynote first."
-                    )
-                ]
-            }
+# Optional tool groups: plugin name -> (module, platform.system() values it runs on or None for any,
+# modules it needs). The plugin modules import their heavy dependencies on first call, so loading
+# one only costs its own import; groups the platform cannot run are not registered at all
+PLUGINS = {
+    "imaging": ("imaging_tools", None, ("PIL",)),
+    "keynote": ("keynote_tools", ("Darwin",), ()),
+}
 
-        # Convert (x1, y1, x2, y2) to width and height
-        width = abs(x2 - x1)
-        height = abs(y2 - y1)
-
-        # AppleScript to add a rectangle to the current slide
-        applescript = f'''
-        tell application "Keynote"
-            activate
-            tell front document
-                tell current slide
-                    make new shape at end of shapes
-                    set position of last shape to {{{x1}, {y1}}}
-                    set width of last shape to {width}
-                    set height of last shape to {height}
-                end tell
-            end tell
-        end tell
-        '''
-
-        # Run AppleScript to execute the commands in Keynote
-        subprocess.run(["osascript", "-e", applescript])
-        time.sleep(1)  # Allow time for Keynote to process
-
-        return {
-            "content": [
-                TextContent(
-                    type="text",
-                    text=f"Rectangle drawn in Keynote from ({x1},{y1}) to ({x2},{y2})"
-                )
-            ]
-        }
-    except Exception as e:
-        return {
-            "content": [
-                TextContent(
-                    type="text",
-                    text=f"Error drawing rectangle in Keynote: {str(e)}"
-                )
-            ]
-        }
-    
-@mcp.tool()
-async def mac_add_text_in_keynote(text: str) -> dict:
-    """Add text in Keynote on macOS inside a rectangle shape. Keynote must be open and rectangle must be drawn before calling this tool."""
-    try:
-        # Check if Keynote is running
-        applescript_check = '''
-        tell application "System Events"
-            return exists (processes where name is "Keynote")
-        end tell
-        '''
-        result = subprocess.run(["osascript", "-e", applescript_check], capture_output=True, text=True)
-        if "true" not in result.stdout.lower():
-            return {
-                "content": [
-                    TextContent(
-                        type="text",
-                        text="Keynote is not open. Please open keynote first."
-                    )
-                ]
-            }
+def load_plugins(names: list[str] | None = None) -> list[str]:
+    """Register the tools of every supported plugin in names (all by default), return the loaded names"""
+    loaded = []
+    for name, (module, platforms, requires) in PLUGINS.items():
+        if names is not None and name not in names:
+            continue
+        if platforms is not None and platform.system() not in platforms:
+            continue
+        # find_spec locates a package without importing it
+        if any(importlib.util.find_spec(package) is None for package in requires):
+            continue
+        importlib.import_module(module).register(mcp)
+        loaded.append(name)
+    return loaded
 
-        # AppleScript to add text to the current slide in Keynote
-        applescript = f'''
-        tell application "Keynote"
-            activate
-        end tell
-
-        tell application "System Events"
-            tell process "Keynote"
-                -- Click on the last shape (assuming it's at the center of the slide)
-                click at {{960, 540}}
-                delay 0.5
-                
-                -- Press Command+T to add text
-                keystroke "t" using command down
-                delay 0.5
-                
-                -- Type the text
-                keystroke "{text}"
-            end tell
-        end tell
-        '''
-
-        # Run AppleScript to execute the commands in Keynote
-        subprocess.run(["osascript", "-e", applescript])
-        time.sleep(1)  # Allow time for Keynote to process
-
-        return {
-            "content": [
-                TextContent(
-                    type="text",
-                    text=f"Text '{text}' added successfully to Keynote"
-                )
-            ]
-        }
-    except Exception as e:
-        return {
-            "content": [
-                TextContent(
-                    type="text",
-                    text=f"Error adding text to Keynote: {str(e)}"
-                )
-            ]
-        }
+# MATH_MCP_PLUGINS="imaging" limits the optional groups, the core calculator tools are always served
+plugins = load_plugins(os.environ["MATH_MCP_PLUGINS"].split(",") if os.getenv("MATH_MCP_PLUGINS") else None)
 
 if __name__ == "__main__":
     # Check if running with mcp dev command
     print("STARTING")
-    if len(sys.argv) > 1 and sys.argv[1] == "dev":
-        mcp.run()  # Run without transport for dev server
-    else:
-        mcp.run(transport="stdio")  # Run with stdio for direct execution
+    try:
+        if len(sys.argv) > 1 and sys.argv[1] == "dev":
+            mcp.run()  # Run without transport for dev server
+        else:
+            mcp.run(transport="stdio")  # Run with stdio for direct execution
+    finally:
+        # Join the heavy tool workers so none outlives the server with its semaphores
+        shutdown_process_pool()
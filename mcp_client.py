@@ -3,6 +3,7 @@ from dotenv import load_dotenv
 from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.stdio import stdio_client
 import asyncio
+import json
 from google import genai
 #from google.genai import types
 from concurrent.futures import TimeoutError
@@ -180,6 +181,8 @@ async def main():
                 Examples:
                 - FUNCTION_CALL: Calculator|add|5|3
                 - FUNCTION_CALL: Calculator|strings_to_chars_to_int|INDIA
+                - FUNCTION_CALL: Calculator|evaluate|int_list_to_exponential_sum(strings_to_chars_to_int("INDIA"))
+                - FUNCTION_CALL: Calculator|dataset_reduce|/data/values.npy|mean
                 - FUNCTION_CALL: Calculator|mac_add_text_in_keynote|42
                 - FUNCTION_CALL: Gmail|send_email|x.y@gmail.com|Test Email|test message
                 - FINAL_ANSWER: [42]
@@ -188,6 +191,8 @@ async def main():
                 - When a function returns multiple values, you need to process all of them.
                 - Only give FINAL_ANSWER when you have completed all necessary calculations AND send email to the recipient {email_id}, with appropriate subject based on the query and body is the calculatedfinal answer text.
                 - Do not repeat function calls with the same parameters.
+                - When a calculation can be written as one expression, prefer a single Calculator evaluate call over several function calls.
+                - When the numbers are in a file, pass its path to dataset_reduce instead of listing the numbers.
                 - Do not add parentheses to the function name.
                 - DO NOT include any explanations or additional text.
                 - Your entire response should be a single line starting with either FUNCTION_CALL: or FINAL_ANSWER:
@@ -264,8 +269,12 @@ async def main():
                             schema_properties = tool.inputSchema.get('properties', {})
                             print(f"DEBUG: Schema properties: {schema_properties}")
 
+                            required_params = tool.inputSchema.get('required', [])
+
                             for param_name, param_info in schema_properties.items():
                                 if not params:  # Check if we have enough parameters
+                                    if param_name not in required_params:
+                                        break  # Remaining parameters are optional
                                     raise ValueError(f"Not enough parameters provided for {func_name}")
                                     
                                 value = params.pop(0)  # Get and remove the first parameter
@@ -278,11 +287,21 @@ async def main():
                                     arguments[param_name] = int(value)
                                 elif param_type == 'number':
                                     arguments[param_name] = float(value)
+                                elif param_type == 'boolean':
+                                    arguments[param_name] = value.lower() in ('true', '1', 'yes')
                                 elif param_type == 'array':
-                                    # Handle array input
+                                    # Handle array input, a JSON list is parsed in one C call
                                     if isinstance(value, str):
-                                        value = value.strip('[]').split(',')
-                                    arguments[param_name] = [int(x.strip()) for x in value]
+                                        try:
+                                            parsed = json.loads(value)
+                                        except ValueError:
+                                            parsed = None
+                                        value = parsed if isinstance(parsed, list) else value.strip('[]').split(',')
+                                    if param_info.get('items', {}).get('type') == 'string':
+                                        arguments[param_name] = [str(x).strip() for x in value]
+                                    else:
+                                        # int() skips surrounding whitespace itself
+                                        arguments[param_name] = [x if isinstance(x, (int, float)) else int(x) for x in value]
                                 else:
                                     arguments[param_name] = str(value)
 
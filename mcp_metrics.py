@@ -0,0 +1,212 @@
+"""Per-tool metrics shared by the MCP servers.
+
+instrument(mcp) wraps every function later registered with @mcp.tool() and
+records call counts, error counts, a latency histogram and approximate JSON
+payload sizes in and out. Errors are raised exceptions plus, for servers
+whose tools report failures as a returned value, the results an
+is_error_result predicate recognises. The numbers are served as the metrics://tools
+resource and, when MCP_METRICS_FILE is set, written to that path in the
+Prometheus text format (for node_exporter's textfile collector).
+"""
+import functools
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from typing import Any
+
+from mcp.server.fastmcp import FastMCP
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+# Minimum seconds between two writes of the Prometheus file
+PROMETHEUS_WRITE_INTERVAL = 1.0
+
+
+def payload_size(obj: Any) -> int:
+    """Approximate size of obj once JSON encoded, without encoding it.
+
+    Encoding would cost as much as the tool call itself for large results,
+    and str() of a huge int is refused past sys.get_int_max_str_digits().
+    """
+    if isinstance(obj, str):
+        return len(obj) + 2
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj) * 4 // 3  # base64
+    if obj is None or isinstance(obj, bool):
+        return 4
+    if isinstance(obj, int):
+        return max(1, int(obj.bit_length() * 0.30103) + 1)
+    if isinstance(obj, float):
+        return len(repr(obj))
+    if isinstance(obj, dict):
+        return 2 + sum(payload_size(k) + payload_size(v) + 2 for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return 2 + sum(payload_size(item) + 1 for item in obj)
+    data = getattr(obj, "data", None)
+    if isinstance(data, (bytes, bytearray)):  # Image
+        return payload_size(data)
+    path = getattr(obj, "path", None)
+    if path is not None:  # Image read from a file when it is returned
+        try:
+            return os.path.getsize(path) * 4 // 3
+        except OSError:
+            return 0
+    text = getattr(obj, "text", None)
+    if isinstance(text, str):  # TextContent
+        return payload_size(text)
+    return len(str(obj))
+
+
+class ToolMetrics:
+    """Thread-safe per-tool counters and latency histograms"""
+
+    def __init__(self, server: str, prometheus_path: str | None = None, is_error_result=None):
+        self.server = server
+        self.prometheus_path = prometheus_path
+        # Optional predicate telling a returned failure apart from a result
+        self.is_error_result = is_error_result
+        self.tools = {}
+        self.lock = threading.Lock()
+        self.last_write = 0.0
+
+    def wrap(self, name: str, fn):
+        """Return fn wrapped so every call is recorded under name"""
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    result = await fn(*args, **kwargs)
+                except BaseException:
+                    self.record(name, time.perf_counter() - start, kwargs, None, error=True)
+                    raise
+                self.record(name, time.perf_counter() - start, kwargs, result, self.returned_error(result))
+                return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                self.record(name, time.perf_counter() - start, kwargs, None, error=True)
+                raise
+            self.record(name, time.perf_counter() - start, kwargs, result, self.returned_error(result))
+            return result
+        return wrapper
+
+    def returned_error(self, result: Any) -> bool:
+        """Whether a tool reported a failure through its return value"""
+        return self.is_error_result is not None and bool(self.is_error_result(result))
+
+    def record(self, name: str, seconds: float, arguments: dict, result: Any, error: bool = False) -> None:
+        """Add one call to the metrics of a tool"""
+        bytes_in = payload_size(arguments)
+        bytes_out = 0 if result is None else payload_size(result)
+        with self.lock:
+            tool = self.tools.get(name)
+            if tool is None:
+                tool = self.tools[name] = {
+                    "calls": 0, "errors": 0, "seconds": 0.0,
+                    "buckets": [0] * len(LATENCY_BUCKETS), "bytes_in": 0, "bytes_out": 0,
+                }
+            tool["calls"] += 1
+            tool["errors"] += error
+            tool["seconds"] += seconds
+            tool["bytes_in"] += bytes_in
+            tool["bytes_out"] += bytes_out
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    tool["buckets"][i] += 1
+                    break
+            write_due = self.prometheus_path and time.monotonic() - self.last_write >= PROMETHEUS_WRITE_INTERVAL
+            if write_due:
+                self.last_write = time.monotonic()
+        if write_due:
+            self.write_prometheus()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the metrics of every tool, busiest (by total time) first"""
+        with self.lock:
+            tools = {name: dict(tool, buckets=list(tool["buckets"])) for name, tool in self.tools.items()}
+        result = {}
+        for name, tool in sorted(tools.items(), key=lambda item: -item[1]["seconds"]):
+            result[name] = {
+                "calls": tool["calls"],
+                "errors": tool["errors"],
+                "total_ms": tool["seconds"] * 1000,
+                "mean_ms": tool["seconds"] * 1000 / tool["calls"],
+                "latency_buckets_ms": {
+                    ("inf" if math.isinf(bound) else f"{bound * 1000:g}"): count
+                    for bound, count in zip(LATENCY_BUCKETS, tool["buckets"])
+                },
+                "bytes_in": tool["bytes_in"],
+                "bytes_out": tool["bytes_out"],
+            }
+        return {"server": self.server, "tools": result}
+
+    def prometheus_text(self) -> str:
+        """Render the metrics in the Prometheus text exposition format"""
+        with self.lock:
+            tools = {name: dict(tool, buckets=list(tool["buckets"])) for name, tool in sorted(self.tools.items())}
+        lines = []
+        for metric, kind, key in (
+            ("mcp_tool_calls_total", "counter", "calls"),
+            ("mcp_tool_errors_total", "counter", "errors"),
+            ("mcp_tool_request_bytes_total", "counter", "bytes_in"),
+            ("mcp_tool_response_bytes_total", "counter", "bytes_out"),
+        ):
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, tool in tools.items():
+                lines.append(f'{metric}{{server="{self.server}",tool="{name}"}} {tool[key]}')
+        lines.append("# TYPE mcp_tool_latency_seconds histogram")
+        for name, tool in tools.items():
+            labels = f'server="{self.server}",tool="{name}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, tool["buckets"]):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else f"{bound:g}"
+                lines.append(f'mcp_tool_latency_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"mcp_tool_latency_seconds_sum{{{labels}}} {tool['seconds']}")
+            lines.append(f"mcp_tool_latency_seconds_count{{{labels}}} {tool['calls']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self) -> None:
+        """Atomically replace the Prometheus text file"""
+        tmp_path = f"{self.prometheus_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, self.prometheus_path)
+
+
+def instrument(mcp: FastMCP, prometheus_path: str | None = None, is_error_result=None) -> ToolMetrics:
+    """Record metrics for every tool registered on mcp from now on.
+
+    Must be called before the @mcp.tool() definitions. The decorated
+    functions themselves are returned unchanged, so calling them directly
+    in-process is not measured. is_error_result(result), when given, marks
+    returned values that are failures so they count as errors.
+    """
+    metrics = ToolMetrics(mcp.name, prometheus_path or os.getenv("MCP_METRICS_FILE"), is_error_result)
+    register_tool = mcp.tool
+
+    def tool(name: str | None = None, *args, **kwargs):
+        register = register_tool(name, *args, **kwargs)
+
+        def decorator(fn):
+            register(metrics.wrap(name or fn.__name__, fn))
+            return fn
+        return decorator
+
+    mcp.tool = tool
+
+    @mcp.resource("metrics://tools")
+    def tool_metrics() -> str:
+        """Call counts, errors, latency histograms and payload sizes of every tool"""
+        return json.dumps(metrics.snapshot())
+
+    return metrics
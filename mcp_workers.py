@@ -0,0 +1,71 @@
+"""Worker process pool for CPU-heavy MCP tools.
+
+run_heavy() computes a picklable callable in a spawn-based process pool,
+so a long computation does not block the server's event loop. A call that
+runs past its timeout, or that the client cancels, kills the pool's
+workers; a fresh pool is started on the next call.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Heavy tool calls are stopped after this many seconds
+HEAVY_TOOL_TIMEOUT = float(os.getenv("HEAVY_TOOL_TIMEOUT", "30"))
+HEAVY_TOOL_WORKERS = int(os.getenv("HEAVY_TOOL_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+
+process_pool = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the worker pool for heavy tools, starting it on first use"""
+    global process_pool
+    if process_pool is None:
+        # spawn, not fork: the server process runs an event loop and threads
+        process_pool = ProcessPoolExecutor(
+            max_workers=HEAVY_TOOL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Stop the worker pool, if one was started, and wait for its processes to exit"""
+    global process_pool
+    pool, process_pool = process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def reset_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Kill the workers of pool, abandoning what they compute, and start a new pool on next use"""
+    global process_pool
+    if process_pool is pool:
+        process_pool = None
+    # ProcessPoolExecutor cannot cancel a running call, so stop its processes
+    for process in list((pool._processes or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_heavy(func, timeout: float = HEAVY_TOOL_TIMEOUT):
+    """Run func() in the worker pool so the event loop stays responsive.
+
+    The pool is killed when the call times out or the client cancels it.
+    Calls that lose their pool to another call's timeout run again once.
+    """
+    for attempt in range(2):
+        pool = get_process_pool()
+        future = asyncio.get_running_loop().run_in_executor(pool, func)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except BrokenProcessPool:
+            reset_process_pool(pool)
+            if attempt:
+                raise
+        except asyncio.TimeoutError:
+            reset_process_pool(pool)
+            raise TimeoutError(f"Stopped after {timeout} seconds")
+        except asyncio.CancelledError:
+            reset_process_pool(pool)
+            raise
@@ -0,0 +1,77 @@
+"""read_emails against the fake Gmail backend: one batch request per 50 ids and one batchModify.
+
+Spawns gmail_mcp_server.py over stdio with its API root pointed at
+benchmarks/fake_gmail.FakeGmail, as benchmarks/bench_gmail_tools.py does,
+and counts the round trips a single read_emails call costs.
+"""
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+
+import pytest
+
+pytest.importorskip("mcp")
+pytest.importorskip("googleapiclient")
+from mcp import ClientSession, StdioServerParameters  # noqa: E402
+from mcp.client.stdio import stdio_client  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bench_gmail_startup import write_placeholder_token  # noqa: E402
+from fake_gmail import FakeGmail  # noqa: E402
+
+# Gmail batch requests carry at most this many calls, as gmail_mcp_server.BATCH_REQUEST_SIZE
+BATCH_REQUEST_SIZE = 50
+
+
+async def read_emails(fake: FakeGmail, email_ids: list[str]) -> tuple[dict, dict]:
+    """Call read_emails once, return its result and the fake's counters for that call only"""
+    with tempfile.TemporaryDirectory() as tmp:
+        token_path = os.path.join(tmp, "token.json")
+        write_placeholder_token(token_path)
+        server_params = StdioServerParameters(
+            command=sys.executable,
+            args=[
+                os.path.join(ROOT, "gmail_mcp_server.py"),
+                "--creds-file-path", os.path.join(ROOT, "credentials.json"),
+                "--token-path", token_path,
+                "--api-root-url", fake.root_url,
+                "--cache-path", "",
+                "--index-path", "",
+                "--cache-memory-mb", "0",
+                "--quota-units-per-second", "1000000",
+            ],
+            cwd=ROOT,
+        )
+        async with stdio_client(server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                before = fake.snapshot()
+                result = await session.call_tool("read_emails", arguments={"email_ids": email_ids})
+                after = fake.snapshot()
+    assert not result.isError, result.content
+    text = result.content[0].text
+    # Tool level failures come back as a plain "An HttpError occurred: ..." string
+    assert text.startswith("{"), text
+    return json.loads(text), {key: after[key] - before[key] for key in after}
+
+
+@pytest.mark.parametrize("count", [1, 50, 120])
+def test_read_emails_batches_gets_and_marks_read_in_bulk(count):
+    fake = FakeGmail(messages=200, message_kb=1).start()
+    try:
+        email_ids = fake.ids[:count]
+        emails, counters = asyncio.run(read_emails(fake, email_ids))
+    finally:
+        fake.stop()
+
+    assert list(emails) == email_ids
+    assert all(isinstance(email, dict) for email in emails.values())
+    assert counters["batch_requests"] == math.ceil(count / BATCH_REQUEST_SIZE)
+    assert counters["batch_modify"] == 1
+    assert counters["requests"] == counters["batch_requests"] + 1
+    assert all("UNREAD" not in fake.labels[email_id] for email_id in email_ids)